@@ -0,0 +1,202 @@
+"""
+Builds the slates and rendered bodies for every week in a date range, e.g.
+
+    PYTHONPATH=../shared/python python gather.py --backfill 2024-09-03 2025-01-06 --output backfill
+    PYTHONPATH=../shared/python python gather.py season.json --backfill 2024-09-03 2025-01-06
+
+Odds come from the source if one is given, either a season payload file or
+a directory of per-week payloads named <week start>.json, and from the odds
+API's historical endpoint otherwise. A season file is precomputed once, which
+leaves each week a lookup and render. Weekly payloads and API snapshots each
+need their own load and precompute, so those weeks are processed in parallel.
+Progress is checkpointed, so rerunning an interrupted backfill picks up where
+it stopped.
+"""
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import requests
+
+import gather
+from odds_board import ODDS_PARAMETERS, format_api_time
+from slate_payload import render_slate
+
+HISTORICAL_ODDS_URL = "https://api.the-odds-api.com/v4/historical/sports/americanfootball_nfl/odds"
+CHECKPOINT_FILE = "checkpoint.json"
+# Weeks are written out and checkpointed in batches of this many
+BATCH_SIZE = 8
+# Take each week's odds as they were when the weekly post goes out, 18:00 PT
+# on the Wednesday after the week starts
+SNAPSHOT_OFFSET = timedelta(days=1, hours=18)
+BODY_NEWLINE = "<br>"
+
+_worker_source = None
+_worker_api_key = None
+
+
+def get_week_starts(start, end):
+    """
+    Returns the start date of every week from the one containing `start` to
+    the one containing `end`.
+    """
+    week_start = gather.get_week_key(start, 1)
+    last_week_start = gather.get_week_key(end, 1)
+    week_starts = []
+    while week_start <= last_week_start:
+        week_starts.append(week_start)
+        week_start += timedelta(weeks=1)
+    return week_starts
+
+
+def load_checkpoint(output_dir):
+    try:
+        with open(os.path.join(output_dir, CHECKPOINT_FILE), "r") as f:
+            return set(json.load(f)["completed"])
+    except FileNotFoundError:
+        return set()
+
+
+def save_checkpoint(output_dir, completed):
+    # Write then rename so an interrupted run never leaves a partial checkpoint
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump({"completed": sorted(completed)}, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def fetch_historical_odds(api_key, week_start):
+    """
+    Fetches the odds for a week's games as they stood at the week's snapshot
+    time from the odds API's historical endpoint.
+    """
+    window_start = gather.PT_TIME_ZOME.localize(datetime(week_start.year, week_start.month, week_start.day))
+    window_end = window_start + timedelta(weeks=1)
+    params = {
+        **ODDS_PARAMETERS,
+        "date": format_api_time(window_start + SNAPSHOT_OFFSET),
+        "commenceTimeFrom": format_api_time(window_start),
+        "commenceTimeTo": format_api_time(window_end),
+        "apiKey": api_key
+    }
+    response = requests.get(HISTORICAL_ODDS_URL, params=params)
+    response.raise_for_status()  # Raise an exception for non-200 status codes
+    return response.json()["data"]
+
+
+def init_worker(source, api_key):
+    global _worker_source, _worker_api_key
+    _worker_source = source
+    _worker_api_key = api_key
+
+
+def process_week(week_start):
+    """
+    Loads one week's odds from a weekly payload or the historical endpoint and
+    builds its slate and rendered body. Runs in a pool process.
+    """
+    if _worker_source:
+        games = gather.fetch_game_data(os.path.join(_worker_source, f"{week_start.isoformat()}.json"))
+        if isinstance(games, dict):
+            # Saved responses from the historical endpoint wrap the games
+            games = games["data"]
+    else:
+        games = fetch_historical_odds(_worker_api_key, week_start)
+    gather.adjust_times_zones(games)
+    slate = gather.precompute_season(games, 1).get(week_start, [])
+
+    return week_start, slate, render_slate(slate, BODY_NEWLINE)
+
+
+def build_season_weeks(source, pending):
+    """
+    Yields each pending week's result from a season payload file or URL, which
+    is loaded and precomputed once. The weeks are only lookups and renders, so
+    they aren't worth sending to a pool.
+    """
+    games = gather.adjust_times_zones(gather.fetch_game_data(source))
+    season = gather.precompute_season(games, 1)
+    for week_start in pending:
+        slate = season.get(week_start, [])
+        yield week_start, (week_start, slate, render_slate(slate, BODY_NEWLINE))
+
+
+def build_pooled_weeks(pending, source, api_key, workers):
+    """
+    Yields each pending week's result as the pool finishes it, or None for
+    weeks that failed.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(source, api_key)) as executor:
+        futures = {executor.submit(process_week, week_start): week_start for week_start in pending}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Error backfilling week of {futures[future]}: {e}")
+                result = None
+            yield futures[future], result
+
+
+def flush_batch(output_dir, results, completed):
+    """
+    Writes a batch of finished weeks, then marks them done in the checkpoint.
+    """
+    if not results:
+        return
+    for week_start, slate, body in results:
+        with open(os.path.join(output_dir, f"{week_start.isoformat()}.json"), "w") as f:
+            json.dump({"week_start": week_start.isoformat(), "slate": slate, "body": body}, f)
+    completed.update(week_start.isoformat() for week_start, _, _ in results)
+    save_checkpoint(output_dir, completed)
+
+
+def run_backfill(start, end, output_dir, source=None, api_key=None, workers=None):
+    """
+    Processes every week between `start` and `end` and writes each week's
+    slate and body to <output_dir>/<week start>.json.
+
+    Args:
+        start (datetime): Any date in the first week to backfill.
+        end (datetime): Any date in the last week to backfill.
+        output_dir (str): Directory for the output files and checkpoint.
+        source (str, optional): Season payload file or directory of weekly
+        payloads. Uses the odds API's historical endpoint if not given.
+        api_key (str, optional): Key for the odds API, needed without a source.
+        workers (int, optional): Number of pool processes for weekly payloads
+        and the historical endpoint. Defaults to the number of CPUs.
+
+    Returns:
+        tuple: The number of weeks processed by this run and the start dates
+        of the weeks that failed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    completed = load_checkpoint(output_dir)
+    pending = [week_start for week_start in get_week_starts(start, end) if week_start.isoformat() not in completed]
+    logging.info(f"Backfilling {len(pending)} weeks, {len(completed)} already done.")
+
+    if not pending:
+        return 0, []
+    if source and not os.path.isdir(source):
+        results = build_season_weeks(source, pending)
+    else:
+        results = build_pooled_weeks(pending, source, api_key, workers)
+
+    batch = []
+    failed = []
+    try:
+        for week_start, result in results:
+            if result is None:
+                # Left out of the checkpoint so the next run tries it again
+                failed.append(week_start)
+                continue
+            batch.append(result)
+            if len(batch) >= BATCH_SIZE:
+                flush_batch(output_dir, batch, completed)
+                batch = []
+    finally:
+        # Keep the weeks that did finish if the run is interrupted
+        flush_batch(output_dir, batch, completed)
+
+    return len(pending) - len(failed), sorted(failed)
@@ -1,17 +1,31 @@
 import argparse
 import boto3
-import io
 import json
 import logging
 import os
 import pytz
 import requests
+import sys
+import time
 from get_secret_value import GetSecretWrapper
+from memory_profile import MemoryProfiler
+from odds_board import refresh_board
+from slate_payload import encode_payload, render_slate
 from dateutil.parser import isoparse
 from datetime import datetime, timedelta
 
 PT_TIME_ZOME = pytz.timezone('US/Pacific')
 POSTER_LAMBDA_ARN = "POSTER_LAMBDA_ARN"
+ENV_VAR_SECRET_ARN = "SECRET_ARN"
+SUBSECRET_KEY = "the-odds-api-key"
+# checkov:skip=CKV_SECRET_6: not a secret
+WEEK_QUERY_PARAMETER = "week"
+# How long a warm Lambda container keeps serving a precomputed season
+SEASON_CACHE_TTL_SECONDS = 300
+API_SEASON_CACHE_KEY = "odds-api"
+
+_season_cache = {}
+profiler = MemoryProfiler()
 
 logging.basicConfig(level=logging.INFO)
 
@@ -79,68 +93,132 @@ def get_week_start_end(date, week_start=1):
     return week_start_date, week_end_date
 
 
-def transform_game_data(games):
-    start_of_week, end_of_week = get_week_start_end(
-        datetime.now(tz=PT_TIME_ZOME), 1)
-
-    # Filter games within the current week
-    this_weeks_games = [
-        game
-        for game in games
-        if isoparse(game["commence_time"]) >= start_of_week
-        and
-        isoparse(game["commence_time"]) <= end_of_week
-    ]
-
-    sorted_games = sorted(
-        this_weeks_games, key=lambda x: isoparse(x['commence_time']))
-
-    transformed_games = []
-
-    for game in sorted_games:
-        spreads = game["bookmakers"][0]["markets"][0]["outcomes"]
-        totals = game["bookmakers"][0]["markets"][1]["outcomes"][0]["point"]
-
-        # Find the team with the negative spread
-        for outcome in spreads:
-            if outcome["point"] < 0:
-                negative_spread_team = outcome["name"]
-                point_spread = outcome["point"]
-
-        # Append formatted game info
-        transformed_games.append({
-            "commence_time": game["commence_time"],
-            "favored_team": negative_spread_team,
-            "away_team": game["away_team"],
-            "home_team": game["home_team"],
-            "point_spread": adjust_float(point_spread),
-            "totals_point": adjust_float(totals)
-        })
-
-    return transformed_games
+def get_week_key(date, week_start=1):
+    """
+    Returns the date the week containing `date` starts on. Used as the key for
+    a week's slate, so any date in a week maps straight to that week's games.
 
+    Args:
+        date (datetime): A timezone aware datetime in Pacific time.
+        week_start (int, optional): The day of the week to consider as the
+        week start (0=Monday, 1=Tuesday, ... 6=Sunday). Default is 1 (Tuesday).
 
-def format_games(formatted_games, newline_symbol):
-    current_day = None
+    Returns:
+        datetime.date: The first day of the week.
+    """
+    return (date - timedelta(days=(date.weekday() - week_start) % 7)).date()
+
+
+def get_market_outcomes(game, market_key):
+    """
+    Returns the outcomes of the first bookmaker's market with the given key,
+    e.g. "spreads" or "totals", or None if it has no lines for that market.
+    """
+    for market in game["bookmakers"][0].get("markets", []):
+        if market["key"] == market_key and market.get("outcomes"):
+            return market["outcomes"]
+    return None
+
+
+def transform_game(game):
+    """
+    Picks the favored team, spread and total out of a game from the odds API.
+    Returns None for games missing the spreads or totals market, which is
+    normal for games several weeks out.
+    """
+    spreads = get_market_outcomes(game, "spreads")
+    totals_outcomes = get_market_outcomes(game, "totals")
+    if not spreads or not totals_outcomes:
+        return None
+    totals = totals_outcomes[0]["point"]
+
+    # Default to the first listed team for pick'em games with no negative spread
+    negative_spread_team = spreads[0]["name"]
+    point_spread = spreads[0]["point"]
+
+    # Find the team with the negative spread
+    for outcome in spreads:
+        if outcome["point"] < 0:
+            negative_spread_team = outcome["name"]
+            point_spread = outcome["point"]
+
+    return {
+        "commence_time": game["commence_time"],
+        "favored_team": negative_spread_team,
+        "away_team": game["away_team"],
+        "home_team": game["home_team"],
+        "point_spread": adjust_float(point_spread),
+        "totals_point": adjust_float(totals)
+    }
 
-    buffer = io.StringIO()
 
-    for game in formatted_games:
+def group_games_by_day(transformed_games):
+    """
+    Groups games that are already sorted by kickoff into a list of
+    (day name, games) tuples, one per day that has games.
+    """
+    days = []
+    for game in transformed_games:
         game_day = isoparse(game["commence_time"]).strftime("%A")  # Get day of the week
-        if game_day != current_day:  # Print day heading if day changes
-            current_day = game_day
-            buffer.write(f"{newline_symbol}*** {current_day.upper()} ***{newline_symbol}{newline_symbol}")
-
-        if game['favored_team'] == game['away_team']:
-            buffer.write(
-                f"{game['away_team']} | {game['point_spread']} | {game['totals_point']}{newline_symbol}")
-            buffer.write(f"{game['home_team']}{newline_symbol}{newline_symbol}")
-        else:
-            buffer.write(f"{game['away_team']}{newline_symbol}")
-            buffer.write(
-                f"{game['home_team']} | {game['point_spread']} | {game['totals_point']}{newline_symbol}{newline_symbol}")
+        if not days or days[-1][0] != game_day:
+            days.append((game_day, []))
+        days[-1][1].append(game)
+    return days
+
+
+def precompute_season(games, week_start=1):
+    """
+    Buckets a whole season's odds payload by week in a single pass. Each
+    week's games are transformed, sorted by kickoff and grouped by day, so
+    serving any week afterwards is a dictionary lookup plus render.
+
+    Args:
+        games (list): Games from the odds API with commence times already
+        converted to Pacific time.
+        week_start (int, optional): The day of the week to consider as the
+        week start (0=Monday, 1=Tuesday, ... 6=Sunday). Default is 1 (Tuesday).
+
+    Returns:
+        dict: Maps the start date of each week to that week's games grouped by
+        day, as returned by group_games_by_day.
+    """
+    weeks = {}
+    for game in games:
+        if not game.get("bookmakers"):
+            # Games that have finished or have no lines yet carry no odds
+            continue
+        transformed_game = transform_game(game)
+        if transformed_game is None:
+            logging.info(f"Skipping {game['away_team']} at {game['home_team']}: missing spreads or totals.")
+            continue
+        commence_time = isoparse(game["commence_time"])
+        week_key = get_week_key(commence_time, week_start)
+        weeks.setdefault(week_key, []).append((commence_time, transformed_game))
+
+    season = {}
+    for week_key, week_games in weeks.items():
+        week_games.sort(key=lambda x: x[0])
+        season[week_key] = group_games_by_day([game for _, game in week_games])
+
+    return season
+
+
+def get_week_slate(season, date, week_start=1):
+    """
+    Looks up the slate for the week containing `date`. Returns an empty slate
+    for weeks with no games in the payload.
+    """
+    return season.get(get_week_key(date, week_start), [])
+
+
+def transform_game_data(games):
+    season = precompute_season(games, 1)
+    this_weeks_slate = get_week_slate(season, datetime.now(tz=PT_TIME_ZOME), 1)
+    return [game for _, day_games in this_weeks_slate for game in day_games]
+
 
-    return buffer.getvalue()
+def format_games(formatted_games, newline_symbol):
+    return render_slate(group_games_by_day(formatted_games), newline_symbol)
 
 
 def adjust_float(num):
@@ -192,60 +270,193 @@ def get_env_var(var_name):
         raise
 
 
-def main(newline_symbol):
-    # https://the-odds-api.com/liveapi/guides/v4/#overview
-    API_BASE_URL = "https://api.the-odds-api.com/v4/sports/americanfootball_nfl/odds/"
-    API_PARAMETERS = "?regions=us&markets=spreads,totals&bookmakers=draftkings&apiKey="
-    ENV_VAR_SECRET_ARN = "SECRET_ARN"
-    SUBSECRET_KEY = "the-odds-api-key"
-  # checkov:skip=CKV_SECRET_6: not a secret
+def get_cached_season(key):
+    cached = _season_cache.get(key)
+    if cached and time.time() - cached["fetched_at"] < SEASON_CACHE_TTL_SECONDS:
+        logging.info("Using cached season slates.")
+        return cached["season"]
+    return None
+
+
+def get_season(source):
+    """
+    Fetches the odds payload and precomputes every week's slate, reusing the
+    result from earlier invocations in the same container while it is fresh.
+
+    :param source: File path or URL for the JSON data.
+    :type source: str
+    """
+    season = get_cached_season(source)
+    if season is not None:
+        return season
+
+    with profiler.stage("fetch_game_data"):
+        games_data = fetch_game_data(source)
+    with profiler.stage("adjust_times_zones"):
+        adjust_times_zones(games_data)
+    with profiler.stage("precompute_season"):
+        season = precompute_season(games_data, 1)
+    _season_cache[source] = {"fetched_at": time.time(), "season": season}
+    return season
 
+
+def get_api_season():
+    """
+    Brings the cached odds board up to date for the current week and
+    precomputes every week's slate from it, reusing the result from earlier
+    invocations in the same container while it is fresh. Other weeks are served
+    from whatever the board holds, so requests for them never reach the API.
+    """
+    season = get_cached_season(API_SEASON_CACHE_KEY)
+    if season is not None:
+        return season
+
+    window_start, window_end = get_week_start_end(datetime.now(tz=PT_TIME_ZOME), 1)
+    with profiler.stage("fetch_game_data"):
+        games_data = refresh_board(get_odds_api_key(), window_start, window_end)
+    with profiler.stage("adjust_times_zones"):
+        adjust_times_zones(games_data)
+    with profiler.stage("precompute_season"):
+        season = precompute_season(games_data, 1)
+    _season_cache[API_SEASON_CACHE_KEY] = {"fetched_at": time.time(), "season": season}
+    return season
+
+
+def parse_week_of(value):
+    """
+    Parses a date string naming any day of the week to serve into a Pacific
+    time datetime.
+    """
+    week_of = isoparse(value)
+    if week_of.tzinfo is None:
+        return PT_TIME_ZOME.localize(week_of)
+    return week_of.astimezone(PT_TIME_ZOME)
+
+
+def parse_args():
     parser = argparse.ArgumentParser(description="Process football game data")
     parser.add_argument("source", nargs="?", type=str,
                         help="File path or URL for the JSON data (optional)")
-    args = parser.parse_args()
-
+    parser.add_argument("--week", type=parse_week_of,
+                        help="Any date in the week to show, e.g. 2024-09-10 (optional, defaults to this week)")
+    parser.add_argument("--backfill", nargs=2, type=parse_week_of, metavar=("FROM", "TO"),
+                        help="Build every week between two dates instead of a single week (optional)")
+    parser.add_argument("--output", type=str, default="backfill",
+                        help="Directory for backfilled weeks (optional, defaults to ./backfill)")
+    parser.add_argument("--workers", type=int,
+                        help="Number of processes for the backfill (optional, defaults to the number of CPUs)")
+    return parser.parse_args()
+
+
+def get_odds_api_key():
     secret_arn = get_env_var(ENV_VAR_SECRET_ARN)
+    return get_secret(secret_arn, SUBSECRET_KEY)
+
+
+def load_week_slate(week_of=None, args=None):
+    """
+    Loads the odds payload from the source given on the command line, or the
+    odds API if there is none, and returns the slate for the requested week.
+
+    Returns:
+        tuple: The week's start date and its games grouped by day.
+    """
+    args = args or parse_args()
+    week_of = week_of or args.week or datetime.now(tz=PT_TIME_ZOME)
 
     if args.source:
         logging.info(f"Using local file: {args.source}")
-        games_data = fetch_game_data(args.source)
+        season = get_season(args.source)
     else:
-        url = API_BASE_URL + API_PARAMETERS + get_secret(secret_arn, SUBSECRET_KEY)
-        logging.info(f"Using API URL: {API_BASE_URL + API_PARAMETERS}")
-        games_data = fetch_game_data(url)
+        logging.info("Using the odds API")
+        season = get_api_season()
+
+    return get_week_key(week_of, 1), get_week_slate(season, week_of, 1)
 
-    adjust_times_zones(games_data)
-    transformed_game_data = transform_game_data(games_data)
-    jimbo = str(format_games(transformed_game_data, newline_symbol))
+
+def build_response(slate, newline_symbol):
+    with profiler.stage("render_slate"):
+        body = render_slate(slate, newline_symbol)
     response = {
         "statusCode": 200,
         "headers": {
             "Content-Type": "text/plain"
         },
-        "body": jimbo
+        "body": body
     }
 
     return response
 
 
-if __name__ == "__main__":
-    output = main("\n")["body"]
-    print(output)
-
+def main(newline_symbol, week_of=None):
+    args = parse_args()
+    if args.backfill:
+        # Imported here as the backfill builds on this module
+        from backfill import run_backfill
+        start, end = args.backfill
+        api_key = None if args.source else get_odds_api_key()
+        weeks, failed = run_backfill(start, end, args.output, args.source, api_key, args.workers)
+        body = f"Backfilled {weeks} weeks to {args.output}"
+        if failed:
+            body += f". Failed weeks, which the next run will retry: {', '.join(map(str, failed))}"
+        response = {
+            "statusCode": 500 if failed else 200,
+            "headers": {
+                "Content-Type": "text/plain"
+            },
+            "body": body
+        }
+        return response
+
+    _, slate = load_week_slate(week_of, args)
+    return build_response(slate, newline_symbol)
 
-def lambda_handler(event, context):
-    body = main("<br>")
-    poster_lambda_arn = get_env_var(POSTER_LAMBDA_ARN)
-    data = {
-        "body": body
-    }
 
-    response = boto3.client('lambda').invoke(
-        FunctionName=poster_lambda_arn,
-        Payload=json.dumps(data)
-    )
-    # logging.info(f"Payload: {response.Payload}")
+if __name__ == "__main__":
+    response = main("\n")
+    print(response["body"])
+    profiler.report()
+    if response["statusCode"] != 200:
+        # Lets scripts rerunning a backfill tell that weeks are still missing
+        sys.exit(1)
 
-    return body
 
+def lambda_handler(event, context):
+    profiler.reset()
+    try:
+        query_parameters = (event or {}).get("queryStringParameters") or {}
+        requested_week = query_parameters.get(WEEK_QUERY_PARAMETER)
+        if requested_week:
+            # Past and upcoming weeks are only served over HTTP, never posted
+            try:
+                week_of = parse_week_of(requested_week)
+            except ValueError:
+                return {
+                    "statusCode": 400,
+                    "headers": {
+                        "Content-Type": "text/plain"
+                    },
+                    "body": f"Invalid {WEEK_QUERY_PARAMETER}: {requested_week}"
+                }
+            return main("<br>", week_of)
+
+        week_start, slate = load_week_slate()
+        body = build_response(slate, "<br>")
+        poster_lambda_arn = get_env_var(POSTER_LAMBDA_ARN)
+        # Send the structured slate rather than the rendered body. The poster
+        # renders it, which keeps the invoke payload small as slates grow.
+        with profiler.stage("encode_payload"):
+            data = {
+                "envelope": encode_payload({"week_start": week_start.isoformat(), "slate": slate})
+            }
+
+        response = boto3.client('lambda').invoke(
+            FunctionName=poster_lambda_arn,
+            Payload=json.dumps(data)
+        )
+        # logging.info(f"Payload: {response.Payload}")
+
+        return body
+    finally:
+        # Report failed invocations too, which are often the ones that ran out of memory
+        profiler.report()
@@ -0,0 +1,105 @@
+"""
+Bulk version of the week calculations in gather.py and post.py, for mapping
+large numbers of odds snapshot timestamps to (season, week, day of week).
+
+Works on numpy arrays when numpy is installed, as it is for the backtest
+tooling through requirements-dev.txt, and falls back to a much slower loop
+over plain sequences otherwise, e.g. in the Lambda, which doesn't ship numpy.
+The results match get_week_start_end and get_current_nfl_week.
+"""
+import bisect
+import calendar
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SECONDS_PER_DAY = 24 * 60 * 60
+DAYS_PER_WEEK = 7
+# 1970-01-01 was a Thursday
+EPOCH_WEEKDAY = 3
+EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+
+def get_utc_offset_table(tz):
+    """
+    Returns the UTC epochs at which the zone's offset changes and the offset in
+    seconds from each one on, so offsets can be looked up without building a
+    datetime per timestamp.
+    """
+    if hasattr(tz, "_utc_transition_times"):
+        # pytz zones with daylight saving time carry their transition table
+        transitions = [calendar.timegm(t.timetuple()) for t in tz._utc_transition_times]
+        offsets = [int(info[0].total_seconds()) for info in tz._transition_info]
+        return transitions, offsets
+    offset = tz.utcoffset(None)
+    if offset is None:
+        # e.g. zoneinfo.ZoneInfo, which doesn't expose its transitions
+        raise ValueError(f"Unsupported time zone {tz!r}: use UTC, a fixed offset or a pytz zone.")
+    return [calendar.timegm(datetime.min.timetuple())], [int(offset.total_seconds())]
+
+
+def get_week_start_day(date, week_start=1):
+    """
+    Returns the local start of the week containing `date` as days since the
+    epoch, the same day get_week_start_end starts the week on.
+    """
+    local_date = date.date()
+    return local_date.toordinal() - EPOCH_ORDINAL - (local_date.weekday() - week_start) % DAYS_PER_WEEK
+
+
+def bucket_timestamps(timestamps, season_first_days, week_start=1, tz=timezone.utc):
+    """
+    Maps epoch timestamps to the season, week number and day of week they
+    fall in.
+
+    Args:
+        timestamps: Epoch timestamps in seconds, as a list or numpy array.
+        season_first_days (dict): Maps each season to a datetime on the first
+        day of its regular season, e.g. from get_current_nfl_season_first_day.
+        week_start (int, optional): The day of the week the league's weeks
+        start on (0=Monday, 1=Tuesday, ... 6=Sunday). Default is 1 (Tuesday).
+        tz (tzinfo, optional): The zone weeks are counted in, either a fixed
+        offset or a pytz zone. Default is UTC, which is what post.py uses.
+
+    Returns:
+        tuple: The season, week number and day of week (0=Monday) of each
+        timestamp, as numpy arrays if numpy is installed and lists otherwise.
+        Timestamps before the first season are put in it with a week number
+        below 1, as get_current_nfl_week does.
+    """
+    if not season_first_days:
+        raise ValueError("At least one season must be provided.")
+
+    seasons = sorted(
+        season_first_days,
+        key=lambda season: get_week_start_day(localize(season_first_days[season], tz), week_start))
+    week_1_days = [get_week_start_day(localize(season_first_days[season], tz), week_start) for season in seasons]
+    transitions, offsets = get_utc_offset_table(tz)
+
+    if np is not None:
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        offset_index = np.searchsorted(transitions, timestamps, side="right") - 1
+        local_days = (timestamps + np.asarray(offsets, dtype=np.int64)[offset_index]) // SECONDS_PER_DAY
+        season_index = np.maximum(np.searchsorted(week_1_days, local_days, side="right") - 1, 0)
+        weeks = (local_days - np.asarray(week_1_days, dtype=np.int64)[season_index]) // DAYS_PER_WEEK + 1
+        days_of_week = (local_days + EPOCH_WEEKDAY) % DAYS_PER_WEEK
+        return np.asarray(seasons)[season_index], weeks, days_of_week
+
+    season_list, weeks, days_of_week = [], [], []
+    for timestamp in timestamps:
+        timestamp = int(timestamp)
+        local_days = (timestamp + offsets[bisect.bisect_right(transitions, timestamp) - 1]) // SECONDS_PER_DAY
+        season_index = max(bisect.bisect_right(week_1_days, local_days) - 1, 0)
+        season_list.append(seasons[season_index])
+        weeks.append((local_days - week_1_days[season_index]) // DAYS_PER_WEEK + 1)
+        days_of_week.append((local_days + EPOCH_WEEKDAY) % DAYS_PER_WEEK)
+    return season_list, weeks, days_of_week
+
+
+def localize(date, tz):
+    if date.tzinfo is None:
+        return tz.localize(date) if hasattr(tz, "localize") else date.replace(tzinfo=tz)
+    return date.astimezone(tz)
@@ -0,0 +1,154 @@
+"""
+Keeps a cached board of NFL odds and asks the odds API only for what a run
+actually needs: games in the window being served that are missing from the
+board, or that haven't kicked off and have stale odds. Games that have
+started keep the last odds fetched before kickoff.
+"""
+import json
+import logging
+import time
+from datetime import timedelta, timezone
+
+import requests
+from dateutil.parser import isoparse
+
+from slate_payload import build_payload_store
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# https://the-odds-api.com/liveapi/guides/v4/#overview
+API_BASE_URL = "https://api.the-odds-api.com/v4/sports/americanfootball_nfl"
+ODDS_PARAMETERS = {
+    "regions": "us",
+    "markets": "spreads,totals",
+    "bookmakers": "draftkings"
+}
+BOARD_KEY = "odds-board/americanfootball_nfl.json"
+# Lines for games that haven't started are refetched once they are this old
+ODDS_REFRESH_SECONDS = 15 * 60
+# Keep a season's worth of games so past weeks can still be served
+BOARD_RETENTION_DAYS = 200
+
+
+def format_api_time(date):
+    """
+    Formats a datetime the way the odds API expects its commence time filters.
+    """
+    return date.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def load_board(store):
+    """
+    Loads the cached board, starting a new one only if there isn't one yet.
+    Read errors and corrupt boards are raised rather than replaced, so the
+    season's history and pre-kickoff lines are never overwritten.
+    """
+    data = store.get(BOARD_KEY)
+    if data is None:
+        logger.info("Starting a new odds board.")
+        return {"games": {}, "fetched_at": {}}
+    return json.loads(data)
+
+
+def save_board(store, board):
+    store.put(BOARD_KEY, json.dumps(board, separators=(",", ":")).encode("utf-8"))
+
+
+def get_from_api(path, api_key, params):
+    response = requests.get(f"{API_BASE_URL}/{path}", params={**params, "apiKey": api_key})
+    response.raise_for_status()  # Raise an exception for non-200 status codes
+    remaining = response.headers.get("x-requests-remaining")
+    if remaining is not None:
+        logger.info(f"Odds API requests remaining: {remaining}")
+    return response.json()
+
+
+def plan_fetch(board, events, now):
+    """
+    Picks the events whose odds need fetching: those missing from the board,
+    and those that haven't kicked off yet and have stale odds.
+
+    Args:
+        board (dict): The cached board.
+        events (list): Events from the odds API's events endpoint.
+        now (float): The current epoch time.
+
+    Returns:
+        list: Ids of the events to fetch odds for.
+    """
+    return [
+        event["id"]
+        for event in events
+        if event["id"] not in board["games"]
+        or (isoparse(event["commence_time"]).timestamp() > now
+            and now - board["fetched_at"][event["id"]] >= ODDS_REFRESH_SECONDS)
+    ]
+
+
+def merge_odds(board, games, now):
+    for game in games:
+        # Keep the last lines we had if the bookmaker has pulled them, but
+        # still mark the game fetched so it isn't requested again every run
+        if game.get("bookmakers") or game["id"] not in board["games"]:
+            board["games"][game["id"]] = game
+        board["fetched_at"][game["id"]] = now
+
+
+def prune_board(board, now):
+    cutoff = now - timedelta(days=BOARD_RETENTION_DAYS).total_seconds()
+    for game_id, game in list(board["games"].items()):
+        if isoparse(game["commence_time"]).timestamp() < cutoff:
+            del board["games"][game_id]
+            board["fetched_at"].pop(game_id, None)
+
+
+def refresh_board(api_key, window_start, window_end, store=None, now=None):
+    """
+    Brings the cached board up to date for a window and returns every game on
+    it. The events endpoint, which doesn't count against the API quota, lists
+    the games in the window that haven't finished. Odds are then fetched only
+    for the ones that need it, filtered by commence time and event id. Nothing
+    is requested if the window was checked less than ODDS_REFRESH_SECONDS ago.
+
+    Args:
+        api_key (str): Key for the odds API.
+        window_start (datetime): Start of the window being served.
+        window_end (datetime): End of the window being served.
+        store: FileObjectStore or S3ObjectStore holding the board.
+        now (float, optional): The current epoch time.
+
+    Returns:
+        list: Copies of the games on the board with commence times in UTC.
+    """
+    store = store or build_payload_store()
+    now = now or time.time()
+    board = load_board(store)
+    checked = board.get("checked", {})
+
+    if window_end.timestamp() <= now:
+        logger.info("The window has passed. Using the cached board.")
+    elif checked.get("window_start") == window_start.isoformat() and now - checked["at"] < ODDS_REFRESH_SECONDS:
+        logger.info("The board was checked recently. Using the cached board.")
+    else:
+        window_params = {
+            "commenceTimeFrom": format_api_time(window_start),
+            "commenceTimeTo": format_api_time(window_end)
+        }
+        events = get_from_api("events", api_key, window_params)
+        event_ids = plan_fetch(board, events, now)
+        logger.info(f"{len(events)} unfinished games in window, fetching odds for {len(event_ids)}.")
+
+        if event_ids:
+            games = get_from_api("odds", api_key, {
+                **ODDS_PARAMETERS,
+                **window_params,
+                "eventIds": ",".join(event_ids)
+            })
+            merge_odds(board, games, now)
+            prune_board(board, now)
+        # Lets other containers skip the events call until the odds go stale
+        board["checked"] = {"window_start": window_start.isoformat(), "at": now}
+        save_board(store, board)
+
+    return [dict(game) for game in board["games"].values()]
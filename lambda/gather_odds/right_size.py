@@ -0,0 +1,188 @@
+"""
+Recommends a Lambda memory setting from local runs of the gather and post
+stages at several payload sizes.
+
+    PYTHONPATH=../shared/python python right_size.py games.json --scales 1 4 16 64
+
+Each scale runs in a fresh process so peak RSS is measured per payload size.
+The games in the sample payload are repeated across later weeks to build the
+larger payloads, like a season-long odds board would.
+"""
+import argparse
+import copy
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from multiprocessing import get_context
+
+from dateutil.parser import isoparse
+
+logging.basicConfig(level=logging.INFO)
+
+LAMBDA_MEMORY_OPTIONS_MB = [128, 256, 512, 768, 1024, 1536, 1769, 2048, 3008]
+# Lambda gives a function one full vCPU at 1769 MB and a share of it below that
+FULL_VCPU_MEMORY_MB = 1769
+# x86 prices in us-east-1
+PRICE_PER_GB_SECOND = 0.0000166667
+PRICE_PER_REQUEST = 0.0000002
+# Matches the function timeout in the stack, less time for the network calls
+TIMEOUT_BUDGET_MS = 5000
+COST_TOLERANCE = 0.01 / 1_000_000
+# Leave room for payloads larger than the ones measured and for the boto3 clients
+MEMORY_HEADROOM = 1.5
+
+
+def build_payload(games, scale):
+    """
+    Repeats the sample games `scale` times, each copy shifted a week later.
+    """
+    payload = []
+    for week in range(scale):
+        for game in games:
+            scaled_game = copy.deepcopy(game)
+            commence_time = isoparse(game["commence_time"]) + timedelta(weeks=week)
+            scaled_game["commence_time"] = commence_time.isoformat()
+            scaled_game["id"] = f"{game['id']}-{week}"
+            payload.append(scaled_game)
+    return payload
+
+
+def run_stages(gather, slate_payload, path, directory):
+    """
+    Runs the gather stages on the payload, then renders, sends and receives
+    every week in it, as if the gather lambda had run once per week.
+    """
+    from object_store import FileObjectStore
+
+    profiler = gather.profiler
+    store = FileObjectStore(directory)
+    gather._season_cache.clear()
+    season = gather.get_season(path)
+
+    with profiler.stage("render_slate"):
+        for slate in season.values():
+            slate_payload.render_slate(slate, "<br>")
+    with profiler.stage("encode_payload"):
+        envelopes = [
+            slate_payload.encode_payload({"week_start": week_start.isoformat(), "slate": slate}, store)
+            for week_start, slate in season.items()
+        ]
+    with profiler.stage("get_body"):
+        for envelope in envelopes:
+            payload = slate_payload.decode_payload(envelope, store)
+            slate_payload.render_slate(payload["slate"], "<br>")
+
+
+def measure(source, scale):
+    """
+    Runs every stage of both lambdas on a payload of the given scale. Runs in
+    its own process so the peak RSS belongs to this payload only.
+
+    The first pass runs without tracemalloc, which slows allocations down and
+    uses memory of its own, and gives the duration and peak RSS. The second
+    pass is profiled to break memory use down by stage.
+    """
+    import gather
+    import slate_payload
+    from memory_profile import get_peak_rss_mb
+
+    with open(source, "r") as f:
+        games = build_payload(json.load(f), scale)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.json")
+        with open(path, "w") as f:
+            json.dump(games, f)
+
+        gather.profiler.enabled = False
+        start = time.perf_counter()
+        run_stages(gather, slate_payload, path, directory)
+        duration_ms = (time.perf_counter() - start) * 1000
+        peak_rss_mb = get_peak_rss_mb()
+
+        gather.profiler.enabled = True
+        run_stages(gather, slate_payload, path, directory)
+
+    return {
+        "scale": scale,
+        "games": len(games),
+        "payload_bytes": len(json.dumps(games)),
+        "peak_rss_mb": peak_rss_mb,
+        "duration_ms": duration_ms,
+        "stages": gather.profiler.stages
+    }
+
+
+def estimate(run, memory_mb):
+    """
+    Estimates duration and cost per invocation at a memory setting, assuming
+    the local run had at least one full vCPU.
+    """
+    duration_ms = run["duration_ms"] * max(1, FULL_VCPU_MEMORY_MB / memory_mb)
+    # Lambda bills in 1ms increments
+    cost = memory_mb / 1024 * math.ceil(duration_ms) / 1000 * PRICE_PER_GB_SECOND + PRICE_PER_REQUEST
+    return duration_ms, cost
+
+
+def recommend(run):
+    """
+    Picks the cheapest memory setting with enough headroom over the measured
+    peak RSS that also finishes within the timeout budget.
+    """
+    required_mb = run["peak_rss_mb"] * MEMORY_HEADROOM
+    options = [
+        memory_mb for memory_mb in LAMBDA_MEMORY_OPTIONS_MB
+        if memory_mb >= required_mb and estimate(run, memory_mb)[0] <= TIMEOUT_BUDGET_MS
+    ]
+    if not options:
+        options = LAMBDA_MEMORY_OPTIONS_MB[-1:]
+    # Costs are nearly flat until the CPU share stops growing, so take the
+    # smallest setting within a cent per million runs of the cheapest. Time
+    # spent waiting on the network is not measured and costs more per ms at
+    # larger settings.
+    cheapest = min(estimate(run, memory_mb)[1] for memory_mb in options)
+    return min(memory_mb for memory_mb in options if estimate(run, memory_mb)[1] <= cheapest + COST_TOLERANCE)
+
+
+def print_report(runs):
+    for run in runs:
+        print(f"\nScale {run['scale']}: {run['games']} games, {run['payload_bytes'] / 1024:.0f} KiB payload, "
+              f"peak RSS {run['peak_rss_mb']:.1f} MB, {run['duration_ms']:.1f} ms")
+        print("  Profiled stages (tracemalloc slows these down):")
+        for stage_name in dict.fromkeys(stage["stage"] for stage in run["stages"]):
+            stages = [stage for stage in run["stages"] if stage["stage"] == stage_name]
+            print(f"  {stage_name:<20} {sum(stage['duration_ms'] for stage in stages):>9.1f} ms"
+                  f"  traced peak {max(stage['traced_peak_mb'] for stage in stages):>7.2f} MB")
+        print(f"  {'memory (MB)':>12} {'est. ms':>9} {'$ / 1M runs':>12}")
+        for memory_mb in LAMBDA_MEMORY_OPTIONS_MB:
+            duration_ms, cost = estimate(run, memory_mb)
+            marker = " <- recommended" if memory_mb == recommend(run) else ""
+            print(f"  {memory_mb:>12} {duration_ms:>9.1f} {cost * 1_000_000:>12.2f}{marker}")
+
+    overall = max(recommend(run) for run in runs)
+    print(f"\nRecommended memory size for the largest payload measured: {overall} MB")
+    print("Network time for the odds API and MFL is not included in these estimates.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommend a Lambda memory size from local runs")
+    parser.add_argument("source", type=str, help="File path for a sample odds JSON payload")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16, 64],
+                        help="How many weeks of the sample payload to run with")
+    args = parser.parse_args()
+
+    runs = []
+    for scale in args.scales:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            runs.append(executor.submit(measure, os.path.abspath(args.source), scale).result())
+
+    print_report(runs)
+
+
+if __name__ == "__main__":
+    main()
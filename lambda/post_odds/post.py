@@ -9,6 +9,10 @@ import sys
 import time
 import urllib.parse
 import sys
+from memory_profile import MemoryProfiler
+from object_store import FileObjectStore, S3ObjectStore
+from session_cache import KmsCipher, SessionCache
+from slate_payload import decode_payload, render_slate
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -23,6 +27,11 @@ NFL_API_URL = "https://nfl-football-api.p.rapidapi.com/nfl-whitelist"
 SUBSECRET_KEY_NFL_API_API_KEY = "nfl-api-key"
 
 MFL_USER_COOKIE_KEY = "MFL_USER_ID"
+ENV_VAR_SESSION_CACHE_BUCKET = "SESSION_CACHE_BUCKET"
+ENV_VAR_SESSION_CACHE_KMS_KEY_ID = "SESSION_CACHE_KMS_KEY_ID"
+ENV_VAR_SESSION_CACHE_DIR = "SESSION_CACHE_DIR"
+DEFAULT_SESSION_CACHE_DIR = "/tmp/mfl-session-cache"
+SESSION_CACHE_PREFIX = "session-cache/"
 REQUEST_TYPE = "messageBoard"
 YEAR = datetime.date.today().year
 API = "import"
@@ -31,25 +40,52 @@ FRANCHISE_ID = "0008"
 # SUBJECT = ""
 THREAD = ""  # "6480193" == test thread
 
+profiler = MemoryProfiler()
+
 
 def lambda_handler(event, context):
-    cookie = login()
-    logger.info(f"cookie: {cookie}")
-    host = get_host()
+    profiler.reset()
     try:
-        body = event['body']['body']
-    except KeyError as e:
-        logging.error(f"ERROR: Cannot retrieve data from calling lambda event:\n{e}")
+        # Stop before logging in or posting if the event has nothing to post
+        with profiler.stage("get_body"):
+            body = get_body(event)
+        session_cache = build_session_cache()
+        with profiler.stage("get_cookie"):
+            cookie = session_cache.get_cookie()
+        host = get_host()
+
+        first_day_regular_season = get_current_nfl_season_first_day()
+        week_1_start_date, week_1_end_date = get_week_start_end(first_day_regular_season)
+        week = get_current_nfl_week(week_1_start_date, datetime.datetime.now(datetime.timezone.utc))
+        subject = f"Week {week}: Three-Leg Parlay"
+        logger.info(f"subject: {subject}")
+
+        query_object = build_query_object(REQUEST_TYPE, LEAGUE_ID, FRANCHISE_ID, THREAD, subject, body)
+        response = build_http_get_request(f"{host}/{YEAR}/{API}", cookie, query_object)
+        if is_auth_failure(response):
+            # The cached cookie was rejected, so log in once and try again
+            logger.info("MFL rejected the session cookie. Refreshing session.")
+            cookie = session_cache.refresh(stale_cookie=cookie)
+            response = build_http_get_request(f"{host}/{YEAR}/{API}", cookie, query_object)
+        pretty_print_response(response)
+    finally:
+        profiler.report()
 
-    first_day_regular_season = get_current_nfl_season_first_day()
-    week_1_start_date, week_1_end_date = get_week_start_end(first_day_regular_season)
-    week = get_current_nfl_week(week_1_start_date, datetime.datetime.now(datetime.timezone.utc))
-    subject = f"Week {week}: Three-Leg Parlay"
-    logger.info(f"subject: {subject}")
 
-    query_object = build_query_object(REQUEST_TYPE, LEAGUE_ID, FRANCHISE_ID, THREAD, subject, body)
-    response = build_http_get_request(f"{host}/{YEAR}/{API}", cookie, query_object)
-    pretty_print_response(response)
+def get_body(event):
+    """
+    Renders the message board body from the calling lambda's event. The gather
+    lambda sends the week's slate in a compressed envelope. Events with an
+    already rendered body are still accepted.
+    """
+    try:
+        if "envelope" in event:
+            payload = decode_payload(event["envelope"])
+            return render_slate(payload["slate"], "<br>")
+        return event['body']['body']
+    except (KeyError, ValueError) as e:
+        logging.error(f"ERROR: Cannot retrieve data from calling lambda event:\n{e}")
+        raise
 
 
 def get_current_nfl_week(first_game_date, input_date):
@@ -57,15 +93,18 @@ def get_current_nfl_week(first_game_date, input_date):
   Calculates the NFL week number based on the input date and the first game date.
 
   Args:
-    input_date: The input date as a datetime.date object.
-    first_game_date: The date of the first regular season game as a datetime.date object.
+    input_date: The input date as a datetime.datetime object.
+    first_game_date: The date of the first regular season game as a datetime.datetime
+      object in the same timezone as input_date.
 
   Returns:
     The NFL week number.
   """
 
-  # Calculate the difference in days between the input date and the first game date
-  days_since_first_game = (input_date - first_game_date).days
+  # Calculate the difference in calendar days between the input date and the first
+  # game date. Subtracting the datetimes would count elapsed time instead, which is
+  # an hour off for weeks that cross a daylight saving change outside UTC.
+  days_since_first_game = (input_date.date() - first_game_date.date()).days
   logger.info(f"days_since_first_game: {days_since_first_game}")
   # Calculate the NFL week number (assuming Tuesday starts the week)
   nfl_week = days_since_first_game // 7 + 1
@@ -198,7 +237,7 @@ def login():
             cookie_data = response.cookies.get_dict()
             cookie_value = cookie_data[MFL_USER_COOKIE_KEY]
             # print(f"cookie_value: {cookie_value}")
-            return cookie_value
+            return cookie_value, get_cookie_expiry(response)
         else:
             logging.error(f"Login attempt {attempt} failed with status code {response.status_code}. Retrying...")
             time.sleep(SLEEP_SECONDS)
@@ -207,6 +246,58 @@ def login():
     sys.exit(1)
 
 
+def get_cookie_expiry(response):
+    """
+    Returns the expiry of the MFL session cookie as an epoch timestamp, or None
+    if MFL sent it as a session cookie without an expiry.
+    """
+    for cookie in response.cookies:
+        if cookie.name == MFL_USER_COOKIE_KEY:
+            return cookie.expires
+    return None
+
+
+def build_session_cache():
+    """
+    Builds the MFL session cache. Uses S3 and KMS when they are configured and
+    falls back to a local directory otherwise, e.g. when running outside AWS.
+    """
+    bucket = os.environ.get(ENV_VAR_SESSION_CACHE_BUCKET)
+    kms_key_id = os.environ.get(ENV_VAR_SESSION_CACHE_KMS_KEY_ID)
+
+    if bucket:
+        store = S3ObjectStore(boto3.client("s3"), bucket, prefix=SESSION_CACHE_PREFIX)
+    else:
+        store = FileObjectStore(os.environ.get(ENV_VAR_SESSION_CACHE_DIR, DEFAULT_SESSION_CACHE_DIR))
+
+    if kms_key_id:
+        cipher = KmsCipher(boto3.client("kms"), kms_key_id)
+    else:
+        logger.warning("No KMS key configured. MFL session cache will not be encrypted.")
+        cipher = None
+
+    return SessionCache(store, cipher, login)
+
+
+def is_auth_failure(response):
+    """
+    Checks whether MFL rejected the session cookie. MFL reports this either
+    with a 401/403 or with a 200 whose JSON body holds an error about the
+    user not being logged in.
+    """
+    if response.status_code in (401, 403):
+        return True
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    error = data.get("error") if isinstance(data, dict) else None
+    if not error:
+        return False
+    message = error.get("$t", "") if isinstance(error, dict) else str(error)
+    return "logged in" in message.lower() or "cookie" in message.lower()
+
+
 def get_host():
     url = "https://api.myfantasyleague.com/2024/export?TYPE=league&L=15781&JSON=1"
     
@@ -250,7 +341,7 @@ def build_http_get_request(base_url, cookie, query_params):
         logger.info("***MAIN REQUEST***")
         pretty_print_response(response)
 
-        if response.status_code == 200:
+        if response.status_code == 200 or is_auth_failure(response):
             return response
         else:
             logging.error(f"Attempt #{attempt} to post to messageBoard failed with status code {response.status_code}. Retrying...")
@@ -0,0 +1,103 @@
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SESSION_CACHE_KEY = "mfl-session"
+# Treat a cookie as expired a little early so it never lapses mid-request
+EXPIRY_MARGIN_SECONDS = 300
+# MFL does not always send an expiry with the cookie, so fall back to this
+DEFAULT_SESSION_TTL_SECONDS = 24 * 60 * 60
+
+
+class KmsCipher:
+    """
+    Encrypts and decrypts the cached session with a KMS key. The cookie is a
+    few hundred bytes so it fits comfortably under the 4KB KMS Encrypt limit.
+    """
+
+    def __init__(self, kms_client, key_id):
+        self.client = kms_client
+        self.key_id = key_id
+
+    def encrypt(self, plaintext):
+        response = self.client.encrypt(KeyId=self.key_id, Plaintext=plaintext)
+        return response["CiphertextBlob"]
+
+    def decrypt(self, ciphertext):
+        response = self.client.decrypt(KeyId=self.key_id, CiphertextBlob=ciphertext)
+        return response["Plaintext"]
+
+
+class SessionCache:
+    """
+    Reuses the MFL session cookie across invocations and only logs in again
+    when the cached cookie has expired or has been rejected by MFL.
+
+    :param store: FileObjectStore or S3ObjectStore holding the cached session.
+    :param cipher: KmsCipher used to encrypt the session at rest, or None to
+        store it unencrypted (local runs only).
+    :param login_fn: Callable returning a (cookie, expires) tuple, where expires
+        is an epoch timestamp or None.
+    """
+
+    def __init__(self, store, cipher, login_fn, key=SESSION_CACHE_KEY):
+        self.store = store
+        self.cipher = cipher
+        self.login_fn = login_fn
+        self.key = key
+
+    def _load(self):
+        try:
+            data = self.store.get(self.key)
+            if data is None:
+                return None
+            if self.cipher:
+                data = self.cipher.decrypt(data)
+            return json.loads(data)
+        except Exception as e:
+            # A corrupt or undecryptable cache just means we log in again
+            logger.warning(f"Ignoring unreadable session cache: {e}")
+            return None
+
+    def _save(self, session):
+        data = json.dumps(session).encode("utf-8")
+        if self.cipher:
+            data = self.cipher.encrypt(data)
+        self.store.put(self.key, data)
+
+    @staticmethod
+    def _is_valid(session):
+        return bool(session) and session["expires"] - EXPIRY_MARGIN_SECONDS > time.time()
+
+    def get_cookie(self):
+        """
+        Returns a cookie from the cache if it is still valid, otherwise logs in.
+        """
+        session = self._load()
+        if self._is_valid(session):
+            logger.info("Reusing cached MFL session.")
+            return session["cookie"]
+        return self.refresh()
+
+    def refresh(self, stale_cookie=None):
+        """
+        Logs in and caches the new cookie. Runs under the store lock and checks
+        the cache again once the lock is held, so when several posters see the
+        same stale cookie only the first one actually logs in.
+
+        :param stale_cookie: Cookie that MFL just rejected, if any.
+        """
+        with self.store.lock(self.key):
+            session = self._load()
+            if self._is_valid(session) and session["cookie"] != stale_cookie:
+                logger.info("MFL session was refreshed by another caller.")
+                return session["cookie"]
+
+            logger.info("Logging in to MFL for a new session.")
+            cookie, expires = self.login_fn()
+            if not expires:
+                expires = time.time() + DEFAULT_SESSION_TTL_SECONDS
+            self._save({"cookie": cookie, "expires": expires})
+            return cookie
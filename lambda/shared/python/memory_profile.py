@@ -0,0 +1,103 @@
+"""
+Per-stage memory profiling for the lambdas, turned on by setting the
+MEMORY_PROFILE environment variable to 1.
+"""
+import logging
+import os
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+ENV_VAR_MEMORY_PROFILE = "MEMORY_PROFILE"
+TOP_ALLOCATION_SITES = 5
+# Keep the profiler's own bookkeeping out of the allocation sites
+PROFILER_FILES = (tracemalloc.__file__, __file__)
+
+
+def is_enabled():
+    return os.environ.get(ENV_VAR_MEMORY_PROFILE, "").lower() in ("1", "true", "yes")
+
+
+def get_peak_rss_mb():
+    """
+    Returns the process's peak resident set size in MB. This is the figure the
+    Lambda REPORT line calls "Max Memory Used".
+    """
+    # ru_maxrss is in KB on Linux, which is what Lambda runs on
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemoryProfiler:
+    """
+    Records tracemalloc usage, peak RSS growth and duration for named stages.
+
+    ru_maxrss is the process's high-water mark, which spans earlier stages and,
+    in a warm container, earlier invocations. Each stage therefore records how
+    far it raised that mark as peak_rss_growth_mb, which is 0 for stages that
+    stayed under a peak set before them, next to process_peak_rss_mb.
+
+    :param enabled: Whether to profile. Defaults to the MEMORY_PROFILE
+        environment variable, so stages cost nothing when profiling is off.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = is_enabled() if enabled is None else enabled
+        self.stages = []
+
+    def reset(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        peak_rss_before = get_peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            process_peak_rss = get_peak_rss_mb()
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            top_sites = [
+                stat for stat in after.compare_to(before, "lineno")
+                if stat.size_diff > 0 and stat.traceback[0].filename not in PROFILER_FILES
+            ][:TOP_ALLOCATION_SITES]
+            self.stages.append({
+                "stage": name,
+                "duration_ms": duration * 1000,
+                "traced_peak_mb": peak / (1024 * 1024),
+                "traced_current_mb": current / (1024 * 1024),
+                "peak_rss_growth_mb": process_peak_rss - peak_rss_before,
+                "process_peak_rss_mb": process_peak_rss,
+                "top_allocation_sites": [
+                    f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                    f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks)"
+                    for stat in top_sites
+                ]
+            })
+
+    def report(self):
+        """
+        Logs the recorded stages and returns them.
+        """
+        for stage in self.stages:
+            logger.info(
+                f"Memory profile [{stage['stage']}]: {stage['duration_ms']:.1f} ms, "
+                f"traced peak {stage['traced_peak_mb']:.2f} MB, "
+                f"raised peak RSS by {stage['peak_rss_growth_mb']:.1f} MB "
+                f"(process peak {stage['process_peak_rss_mb']:.1f} MB)")
+            for site in stage["top_allocation_sites"]:
+                logger.info(f"    {site}")
+        return self.stages
@@ -0,0 +1,147 @@
+"""
+Key/value object storage shared by the lambdas: the MFL session cache, the
+payloads sent from the gather Lambda to the poster by reference, and the
+cached odds board. S3 is used in AWS and a local directory otherwise.
+
+Both stores return None from get for a missing key and raise on any other
+error, so callers can tell "not there yet" from "couldn't read it".
+"""
+import fcntl
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# The poster times out after 8 seconds, so stop waiting for a lock well
+# before then and carry on without it rather than fail the invocation
+LOCK_WAIT_SECONDS = 3
+# A lock held longer than this was left by a caller that died holding it
+LOCK_STALE_SECONDS = 5
+LOCK_POLL_SECONDS = 0.5
+
+
+class FileObjectStore:
+    """
+    Keeps each key as a file under a directory. Writes go to a temporary file
+    that is renamed into place, so a crash mid-write never leaves a partial
+    object, and locks use flock, which is enough for local runs and for warm
+    invocations sharing a Lambda container's /tmp.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _path(self, key):
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        return path
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        path = self._path(key)
+        # Unique per writer so concurrent puts never share a temporary file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _try_acquire(lock_file):
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    @contextmanager
+    def lock(self, key):
+        with open(f"{self._path(key)}.lock", "w") as lock_file:
+            deadline = time.time() + LOCK_WAIT_SECONDS
+            acquired = self._try_acquire(lock_file)
+            while not acquired and time.time() < deadline:
+                time.sleep(LOCK_POLL_SECONDS)
+                acquired = self._try_acquire(lock_file)
+
+            if not acquired:
+                logger.warning(f"Timed out waiting for the lock on {key}. Continuing without it.")
+            try:
+                yield
+            finally:
+                if acquired:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class S3ObjectStore:
+    """
+    Keeps each key as an object in a bucket, under an optional prefix. Locks
+    are objects created with a conditional put, so only one caller can hold
+    one at a time.
+    """
+
+    def __init__(self, s3_client, bucket, prefix=""):
+        self.client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def get(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+            return response["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def _try_acquire(self, lock_key):
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=lock_key, Body=b"", IfNoneMatch="*")
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] not in ("PreconditionFailed", "ConditionalRequestConflict"):
+                raise
+        # Break locks left behind by a caller that died while holding them
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=lock_key)
+            if time.time() - head["LastModified"].timestamp() > LOCK_STALE_SECONDS:
+                logger.warning("Removing stale lock.")
+                self.client.delete_object(Bucket=self.bucket, Key=lock_key)
+        except self.client.exceptions.ClientError:
+            pass
+        return False
+
+    @contextmanager
+    def lock(self, key):
+        lock_key = self._key(f"{key}.lock")
+        deadline = time.time() + LOCK_WAIT_SECONDS
+        acquired = self._try_acquire(lock_key)
+        while not acquired and time.time() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            acquired = self._try_acquire(lock_key)
+
+        if not acquired:
+            logger.warning(f"Timed out waiting for the lock on {key}. Continuing without it.")
+        try:
+            yield
+        finally:
+            if acquired:
+                self.client.delete_object(Bucket=self.bucket, Key=lock_key)
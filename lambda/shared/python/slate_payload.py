@@ -0,0 +1,125 @@
+"""
+Carries a week's slate from the gather Lambda to the poster Lambda. Both
+functions get this module from the shared layer.
+"""
+import base64
+import gzip
+import io
+import json
+import logging
+import os
+import uuid
+
+from object_store import FileObjectStore, S3ObjectStore
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ENVELOPE_VERSION = 1
+COMPRESSION_ZSTD = "zstd"
+COMPRESSION_GZIP = "gzip"
+# Lambda.invoke accepts 6MB synchronously but only 256KB for async invokes,
+# so anything near that goes to the payload store and is sent by reference
+MAX_INLINE_BYTES = 128 * 1024
+PAYLOAD_KEY_PREFIX = "payloads/"
+ENV_VAR_PAYLOAD_BUCKET = "PAYLOAD_BUCKET"
+ENV_VAR_PAYLOAD_DIR = "PAYLOAD_DIR"
+DEFAULT_PAYLOAD_DIR = "/tmp/mfl-payloads"
+
+
+def build_payload_store():
+    """
+    Uses S3 when a payload bucket is configured and a local directory otherwise.
+    """
+    bucket = os.environ.get(ENV_VAR_PAYLOAD_BUCKET)
+    if bucket:
+        import boto3
+        return S3ObjectStore(boto3.client("s3"), bucket)
+    return FileObjectStore(os.environ.get(ENV_VAR_PAYLOAD_DIR, DEFAULT_PAYLOAD_DIR))
+
+
+def compress(data):
+    if zstandard:
+        return COMPRESSION_ZSTD, zstandard.ZstdCompressor().compress(data)
+    return COMPRESSION_GZIP, gzip.compress(data)
+
+
+def decompress(compression, data):
+    if compression == COMPRESSION_ZSTD:
+        if not zstandard:
+            raise ValueError("Payload is zstd compressed but zstandard is not installed.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == COMPRESSION_GZIP:
+        return gzip.decompress(data)
+    raise ValueError(f"Unknown payload compression: {compression}")
+
+
+def encode_payload(payload, store=None):
+    """
+    Wraps structured data in a compact, versioned envelope that can be sent
+    through Lambda.invoke. Large payloads are written to the store and the
+    envelope only carries their key.
+
+    :param payload: JSON serializable data, e.g. {"week_start": ..., "slate": ...}.
+    :param store: FileObjectStore or S3ObjectStore used for large payloads.
+    """
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    compression, data = compress(raw)
+    envelope = {"version": ENVELOPE_VERSION, "compression": compression}
+
+    if len(data) > MAX_INLINE_BYTES:
+        store = store or build_payload_store()
+        key = f"{PAYLOAD_KEY_PREFIX}{uuid.uuid4()}"
+        store.put(key, data)
+        logger.info(f"Payload of {len(data)} bytes stored by reference.")
+        envelope["ref"] = key
+    else:
+        envelope["data"] = base64.b64encode(data).decode("ascii")
+
+    return envelope
+
+
+def decode_payload(envelope, store=None):
+    """
+    Unwraps an envelope built by encode_payload, fetching the payload from the
+    store if it was sent by reference.
+    """
+    if envelope.get("version") != ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported payload envelope version: {envelope.get('version')}")
+
+    if "ref" in envelope:
+        store = store or build_payload_store()
+        data = store.get(envelope["ref"])
+        if data is None:
+            raise ValueError(f"Payload {envelope['ref']} not found in the payload store.")
+    else:
+        data = base64.b64decode(envelope["data"])
+
+    return json.loads(decompress(envelope["compression"], data))
+
+
+def render_slate(slate, newline_symbol):
+    """
+    Renders a slate of games grouped by day, as (day name, games) pairs, into
+    the text posted to the message board.
+    """
+    buffer = io.StringIO()
+
+    for game_day, day_games in slate:
+        buffer.write(f"{newline_symbol}*** {game_day.upper()} ***{newline_symbol}{newline_symbol}")
+
+        for game in day_games:
+            if game['favored_team'] == game['away_team']:
+                buffer.write(
+                    f"{game['away_team']} | {game['point_spread']} | {game['totals_point']}{newline_symbol}")
+                buffer.write(f"{game['home_team']}{newline_symbol}{newline_symbol}")
+            else:
+                buffer.write(f"{game['away_team']}{newline_symbol}")
+                buffer.write(
+                    f"{game['home_team']} | {game['point_spread']} | {game['totals_point']}{newline_symbol}{newline_symbol}")
+
+    return buffer.getvalue()
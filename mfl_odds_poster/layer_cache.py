@@ -0,0 +1,112 @@
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import sys
+
+logger = logging.getLogger(__name__)
+
+BUILD_ROOT = os.environ.get("LAYER_BUILD_ROOT", ".build")
+COMPLETE_MARKER = ".complete"
+
+
+def get_requirements_hash(requirements_file):
+    """
+    Hashes the requirements file together with the Python version used to
+    install it, since pip picks different wheels for different versions.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{sys.version_info.major}.{sys.version_info.minor}".encode("utf-8"))
+    with open(requirements_file, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def build_dependencies(requirements_file, function_name, build_root=BUILD_ROOT):
+    """
+    Installs the requirements into a layer directory for the function, reusing
+    the directory from an earlier synth when the requirements are unchanged.
+
+    :param requirements_file: Path to the requirements.txt for the layer.
+    :param function_name: Name of the function the layer is for. Each function
+        gets its own directory so builds for one never overwrite another's.
+    :param build_root: Directory the layer builds are kept in.
+    :return: A tuple of the layer directory and the requirements hash.
+        Under SKIP_PIP these belong to the closest completed build instead, see
+        find_skip_pip_build.
+    """
+    requirements_hash = get_requirements_hash(requirements_file)
+    output_dir = os.path.join(build_root, f"{function_name}-{requirements_hash}")
+
+    if os.path.exists(os.path.join(output_dir, COMPLETE_MARKER)):
+        return output_dir, requirements_hash
+
+    if os.environ.get("SKIP_PIP"):
+        return find_skip_pip_build(requirements_hash, function_name, build_root)
+
+    # Install into a scratch directory and move it into place once pip has
+    # finished, so an interrupted build is never mistaken for a cached one
+    staging_dir = f"{output_dir}.staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    sibling_dir = find_completed_build(requirements_hash, build_root)
+    if sibling_dir:
+        # Another function already installed the same requirements
+        shutil.copytree(sibling_dir, staging_dir)
+    else:
+        subprocess.check_call(
+            f"pip install -r {requirements_file} -t {staging_dir}/python".split()
+        )
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.rename(staging_dir, output_dir)
+    with open(os.path.join(output_dir, COMPLETE_MARKER), "w"):
+        pass
+
+    remove_stale_builds(function_name, output_dir, build_root)
+    return output_dir, requirements_hash
+
+
+def find_completed_build(requirements_hash, build_root=BUILD_ROOT):
+    if not os.path.isdir(build_root):
+        return None
+    for name in os.listdir(build_root):
+        path = os.path.join(build_root, name)
+        if name.endswith(f"-{requirements_hash}") and os.path.exists(os.path.join(path, COMPLETE_MARKER)):
+            return path
+    return None
+
+
+def find_skip_pip_build(requirements_hash, function_name, build_root=BUILD_ROOT):
+    """
+    Picks a completed build to use when SKIP_PIP rules out installing the
+    requirements: another function's build of the same requirements, or else
+    the function's most recent build, which may be for older requirements.
+    """
+    sibling_dir = find_completed_build(requirements_hash, build_root)
+    if sibling_dir:
+        return sibling_dir, requirements_hash
+
+    builds = []
+    if os.path.isdir(build_root):
+        for name in os.listdir(build_root):
+            marker = os.path.join(build_root, name, COMPLETE_MARKER)
+            if name.startswith(f"{function_name}-") and os.path.exists(marker):
+                builds.append((os.path.getmtime(marker), name))
+    if not builds:
+        raise RuntimeError(
+            f"SKIP_PIP is set but there is no completed layer build for {function_name} "
+            f"in {build_root}. Run a synth without SKIP_PIP first.")
+
+    _, name = max(builds)
+    logger.warning(f"SKIP_PIP is set. Using the {function_name} layer from {name}, built for other requirements.")
+    return os.path.join(build_root, name), name[len(function_name) + 1:]
+
+
+def remove_stale_builds(function_name, current_dir, build_root=BUILD_ROOT):
+    """
+    Removes the function's layer builds for requirements that have changed since.
+    """
+    for name in os.listdir(build_root):
+        path = os.path.join(build_root, name)
+        if name.startswith(f"{function_name}-") and path != current_dir:
+            shutil.rmtree(path, ignore_errors=True)
@@ -6,7 +6,9 @@ from aws_cdk import (
     aws_iam as iam,
     aws_kms as kms,
     aws_lambda as _lambda,
+    aws_s3 as s3,
     aws_secretsmanager as asm,
+    AssetHashType,
     CfnOutput,
     Duration,
     Fn,
@@ -15,8 +17,8 @@ from aws_cdk import (
 from aws_solutions_constructs.aws_apigateway_lambda import ApiGatewayToLambda
 from aws_solutions_constructs.aws_cloudfront_apigateway_lambda import CloudFrontToApiGatewayToLambda
 from constructs import Construct
+from mfl_odds_poster.layer_cache import COMPLETE_MARKER, build_dependencies
 import os
-import subprocess
 
 
 class MflOddsPosterStack(Stack):
@@ -137,6 +139,21 @@ class MflOddsPosterStack(Stack):
             secret_id=mfl_odds_secret.attr_id  # Required
         )
 
+        mfl_odds_cache_bucket = s3.Bucket(
+            self,
+            "mflOddsCacheBucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+            lifecycle_rules=[
+                # Payloads passed between the lambdas by reference are only read once
+                s3.LifecycleRule(prefix="payloads/", expiration=Duration.days(7))
+            ]
+        )
+        mfl_odds_cache_bucket.grant_read_write(mfl_odds_lambda_role)
+
+        shared_layer = self.create_shared_layer()
+
         AgwToLmb = ApiGatewayToLambda(
             self,
             'ApiGatewayToLambdaPattern',
@@ -145,11 +162,14 @@ class MflOddsPosterStack(Stack):
                 runtime=_lambda.Runtime.PYTHON_3_11,
                 code=_lambda.Code.from_asset('lambda/post_odds'),
                 handler='post.lambda_handler',
-                layers=[self.create_dependencies_layer('lambda/post_odds', 'post')],
+                layers=[shared_layer, self.create_dependencies_layer('lambda/post_odds', 'post')],
                 role=mfl_odds_lambda_role,
                 timeout=Duration.seconds(8),
                 environment={
-                    'SECRET_ARN': mfl_odds_secret.attr_id
+                    'SECRET_ARN': mfl_odds_secret.attr_id,
+                    'SESSION_CACHE_BUCKET': mfl_odds_cache_bucket.bucket_name,
+                    'SESSION_CACHE_KMS_KEY_ID': mfl_odds_kms_key.attr_key_id,
+                    'PAYLOAD_BUCKET': mfl_odds_cache_bucket.bucket_name
                 }
             )
         )
@@ -162,15 +182,16 @@ class MflOddsPosterStack(Stack):
                 runtime=_lambda.Runtime.PYTHON_3_11,
                 code=_lambda.Code.from_asset(
                     'lambda/gather_odds',
-                    exclude=['.envrc', 'games.json']
+                    exclude=['.envrc', 'games.json', 'right_size.py']
                 ),
                 handler='gather.lambda_handler',
-                layers=[self.create_dependencies_layer('lambda/gather_odds', 'gather')],
+                layers=[shared_layer, self.create_dependencies_layer('lambda/gather_odds', 'gather')],
                 role=mfl_odds_lambda_role,
                 timeout=Duration.seconds(8),
                 environment={
                     'SECRET_ARN': mfl_odds_secret.attr_id,
-                    'POSTER_LAMBDA_ARN': AgwToLmb.lambda_function.function_arn
+                    'POSTER_LAMBDA_ARN': AgwToLmb.lambda_function.function_arn,
+                    'PAYLOAD_BUCKET': mfl_odds_cache_bucket.bucket_name
                 }
             ),
             # NOTE - we use RestApiProps here because the actual type,
@@ -218,21 +239,36 @@ class MflOddsPosterStack(Stack):
             role=mfl_odds_lambda_role
         )
 
+    def create_shared_layer(self) -> _lambda.LayerVersion:
+        # Modules both functions import, kept under python/ so Lambda puts
+        # them on the path
+        return _lambda.LayerVersion(
+            self,
+            "shared-modules",
+            code=_lambda.Code.from_asset('lambda/shared', exclude=['**/__pycache__']),
+        )
+
     def create_dependencies_layer(
         self,
         project_name,
         function_name: str) -> _lambda.LayerVersion:
-        requirements_file = "lambda/gather_odds/requirements.txt"  # 👈🏽 point to requirements.txt
-        output_dir = ".build/app"  # 👈🏽 a temp directory to store the dependencies
+        requirements_file = os.path.join(project_name, "requirements.txt")
+        if not os.path.exists(requirements_file):
+            # The poster has no requirements of its own and shares the gatherer's
+            requirements_file = "lambda/gather_odds/requirements.txt"
 
-        if not os.environ.get("SKIP_PIP"):
-            # 👇🏽 download the dependencies and store them in the output_dir
-            subprocess.check_call(
-                f"pip install -r {requirements_file} -t {output_dir}/python".split()
-            )
+        # 👇🏽 download the dependencies once per change to the requirements
+        output_dir, requirements_hash = build_dependencies(requirements_file, function_name)
 
         layer_id = f"{project_name}-{function_name}-dependencies"  # 👈🏽 a unique id for the layer
-        layer_code = _lambda.Code.from_asset(output_dir)  # 👈🏽 import the dependencies / code
+        layer_code = _lambda.Code.from_asset(
+            output_dir,
+            # The requirements hash already identifies the contents, so CDK
+            # doesn't need to hash every installed file on each synth
+            asset_hash=requirements_hash,
+            asset_hash_type=AssetHashType.CUSTOM,
+            exclude=[COMPLETE_MARKER]
+        )
 
         my_layer = _lambda.LayerVersion(
             self,
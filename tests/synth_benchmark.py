@@ -0,0 +1,41 @@
+"""
+Times `cdk synth` of the stack with an empty layer build cache and again with
+the cache warm, to show what the cached dependency layers save.
+
+    python -m tests.synth_benchmark
+"""
+import os
+import sys
+import tempfile
+import time
+
+
+def synth(outdir):
+    import aws_cdk as core
+    from mfl_odds_poster.mfl_odds_poster_stack import MflOddsPosterStack
+
+    start = time.perf_counter()
+    app = core.App(outdir=outdir)
+    MflOddsPosterStack(app, "mfl-odds-poster")
+    app.synth()
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as build_root:
+        # Must be set before the stack module reads it on import
+        os.environ["LAYER_BUILD_ROOT"] = build_root
+        os.environ.pop("SKIP_PIP", None)
+
+        with tempfile.TemporaryDirectory() as outdir:
+            cold = synth(outdir)
+        with tempfile.TemporaryDirectory() as outdir:
+            warm = synth(outdir)
+
+    print(f"synth with empty layer cache: {cold:6.2f} s")
+    print(f"synth with warm layer cache:  {warm:6.2f} s")
+    print(f"speedup:                      {cold / warm:6.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The lambdas import their modules by name from their own directories and
+# the shared layer
+LAMBDA_DIRS = ["lambda/gather_odds", "lambda/post_odds", "lambda/shared/python"]
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for lambda_dir in LAMBDA_DIRS:
+    sys.path.insert(0, os.path.join(ROOT_DIR, lambda_dir))
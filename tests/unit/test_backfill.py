@@ -0,0 +1,125 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from dateutil.parser import isoparse
+
+import backfill
+import gather
+
+GAMES_FILE = os.path.join(os.path.dirname(os.path.abspath(gather.__file__)), "games.json")
+START = gather.parse_week_of("2024-09-24")
+END = gather.parse_week_of("2024-10-07")
+WEEKS = ["2024-09-24", "2024-10-01"]
+
+
+def load_games():
+    with open(GAMES_FILE, "r") as f:
+        return json.load(f)
+
+
+def expected_body(week_start):
+    season = gather.precompute_season(gather.adjust_times_zones(load_games()), 1)
+    return gather.render_slate(season.get(gather.parse_week_of(week_start).date(), []), backfill.BODY_NEWLINE)
+
+
+def read_week(output_dir, week_start):
+    with open(os.path.join(output_dir, f"{week_start}.json"), "r") as f:
+        return json.load(f)
+
+
+def write_week_source(source_dir, week_start):
+    # Saved in the historical endpoint's format, which wraps the games
+    games = [game for game in load_games() if gather.get_week_key(
+        isoparse(gather.convert_utc_to_pacific_time(game["commence_time"])), 1).isoformat() == week_start]
+    with open(os.path.join(source_dir, f"{week_start}.json"), "w") as f:
+        json.dump({"data": games}, f)
+
+
+def test_backfill_from_a_season_file_skips_completed_weeks(tmp_path):
+    output_dir = str(tmp_path / "out")
+
+    assert backfill.run_backfill(START, END, output_dir, GAMES_FILE, workers=1) == (2, [])
+    for week_start in WEEKS:
+        week = read_week(output_dir, week_start)
+        assert week["week_start"] == week_start
+        assert week["body"] == expected_body(week_start)
+        assert week["slate"]
+    assert backfill.load_checkpoint(output_dir) == set(WEEKS)
+
+    assert backfill.run_backfill(START, END, output_dir, GAMES_FILE, workers=1) == (0, [])
+
+
+def test_backfill_from_a_directory_retries_failed_weeks(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    output_dir = str(tmp_path / "out")
+    write_week_source(str(source_dir), WEEKS[0])
+
+    weeks, failed = backfill.run_backfill(START, END, output_dir, str(source_dir), workers=1)
+
+    assert (weeks, [week_start.isoformat() for week_start in failed]) == (1, [WEEKS[1]])
+    assert backfill.load_checkpoint(output_dir) == {WEEKS[0]}
+    assert read_week(output_dir, WEEKS[0])["body"] == expected_body(WEEKS[0])
+    assert not os.path.exists(os.path.join(output_dir, f"{WEEKS[1]}.json"))
+
+    write_week_source(str(source_dir), WEEKS[1])
+    assert backfill.run_backfill(START, END, output_dir, str(source_dir), workers=1) == (1, [])
+    assert backfill.load_checkpoint(output_dir) == set(WEEKS)
+    assert read_week(output_dir, WEEKS[1])["body"] == expected_body(WEEKS[1])
+
+
+def test_backfill_from_a_season_file_runs_without_a_pool(tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("A season file shouldn't start a process pool")
+
+    monkeypatch.setattr(backfill, "ProcessPoolExecutor", no_pool)
+
+    assert backfill.run_backfill(START, END, str(tmp_path / "out"), GAMES_FILE, workers=4) == (2, [])
+
+
+def test_backfill_cli_exits_non_zero_with_failed_weeks(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    write_week_source(str(source_dir), WEEKS[0])
+    command = [sys.executable, "gather.py", str(source_dir), "--backfill", START.date().isoformat(),
+               END.date().isoformat(), "--output", str(tmp_path / "out"), "--workers", "1"]
+    cwd = os.path.dirname(GAMES_FILE)
+    env = {**os.environ, "PYTHONPATH": os.path.join(cwd, os.pardir, "shared", "python")}
+
+    failed_run = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+    assert failed_run.returncode == 1
+    assert f"Failed weeks, which the next run will retry: {WEEKS[1]}" in failed_run.stdout
+
+    write_week_source(str(source_dir), WEEKS[1])
+    assert subprocess.run(command, cwd=cwd, env=env, capture_output=True).returncode == 0
+
+
+def test_backfill_keeps_finished_weeks_when_interrupted(tmp_path, monkeypatch):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    for week_start in WEEKS:
+        write_week_source(str(source_dir), week_start)
+    output_dir = str(tmp_path / "out")
+    completed_as = backfill.as_completed
+
+    def interrupted_as_completed(futures):
+        for future in completed_as(futures):
+            yield future
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(backfill, "as_completed", interrupted_as_completed)
+
+    with pytest.raises(KeyboardInterrupt):
+        backfill.run_backfill(START, END, output_dir, str(source_dir), workers=1)
+
+    completed = backfill.load_checkpoint(output_dir)
+    assert len(completed) == 1
+    week_start = completed.pop()
+    assert read_week(output_dir, week_start)["body"] == expected_body(week_start)
+
+    monkeypatch.setattr(backfill, "as_completed", completed_as)
+    assert backfill.run_backfill(START, END, output_dir, str(source_dir), workers=1) == (1, [])
+    assert backfill.load_checkpoint(output_dir) == set(WEEKS)
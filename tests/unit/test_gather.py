@@ -0,0 +1,221 @@
+import argparse
+import copy
+import json
+import os
+from datetime import date, datetime
+
+import pytest
+from dateutil.parser import isoparse
+
+import gather
+
+GAMES_FILE = os.path.join(os.path.dirname(os.path.abspath(gather.__file__)), "games.json")
+
+
+def load_games():
+    with open(GAMES_FILE, "r") as f:
+        return gather.adjust_times_zones(json.load(f))
+
+
+def make_game(commence_time, spreads, totals=45.0, home_team="New York Giants", away_team="Dallas Cowboys"):
+    markets = [{"key": "spreads", "outcomes": [
+        {"name": away_team, "point": spreads[0]},
+        {"name": home_team, "point": spreads[1]}
+    ]}]
+    if totals is not None:
+        markets.append({"key": "totals", "outcomes": [
+            {"name": "Over", "point": totals},
+            {"name": "Under", "point": totals}
+        ]})
+    return {
+        "commence_time": commence_time,
+        "home_team": home_team,
+        "away_team": away_team,
+        "bookmakers": [{"key": "draftkings", "markets": markets}]
+    }
+
+
+def baseline_transform_game_data(games, now):
+    # The week filter and transform from before the season was precomputed
+    start_of_week, end_of_week = gather.get_week_start_end(now, 1)
+    this_weeks_games = sorted(
+        [game for game in games if start_of_week <= isoparse(game["commence_time"]) <= end_of_week],
+        key=lambda x: isoparse(x["commence_time"]))
+    transformed_games = []
+    for game in this_weeks_games:
+        spreads = game["bookmakers"][0]["markets"][0]["outcomes"]
+        totals = game["bookmakers"][0]["markets"][1]["outcomes"][0]["point"]
+        for outcome in spreads:
+            if outcome["point"] < 0:
+                negative_spread_team = outcome["name"]
+                point_spread = outcome["point"]
+        transformed_games.append({
+            "commence_time": game["commence_time"],
+            "favored_team": negative_spread_team,
+            "away_team": game["away_team"],
+            "home_team": game["home_team"],
+            "point_spread": gather.adjust_float(point_spread),
+            "totals_point": gather.adjust_float(totals)
+        })
+    return transformed_games
+
+
+def baseline_format_games(formatted_games, newline_symbol):
+    current_day = None
+    output = ""
+    for game in formatted_games:
+        game_day = isoparse(game["commence_time"]).strftime("%A")
+        if game_day != current_day:
+            current_day = game_day
+            output += f"{newline_symbol}*** {current_day.upper()} ***{newline_symbol}{newline_symbol}"
+        if game["favored_team"] == game["away_team"]:
+            output += f"{game['away_team']} | {game['point_spread']} | {game['totals_point']}{newline_symbol}"
+            output += f"{game['home_team']}{newline_symbol}{newline_symbol}"
+        else:
+            output += f"{game['away_team']}{newline_symbol}"
+            output += f"{game['home_team']} | {game['point_spread']} | {game['totals_point']}{newline_symbol}{newline_symbol}"
+    return output
+
+
+def freeze_now(monkeypatch, now):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now.astimezone(tz) if tz else now
+
+    monkeypatch.setattr(gather, "datetime", FrozenDatetime)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-09-24T00:00:00", date(2024, 9, 24)),
+    ("2024-09-26T17:15:00", date(2024, 9, 24)),
+    ("2024-09-30T23:59:59", date(2024, 9, 24)),
+    ("2024-10-01T00:00:00", date(2024, 10, 1)),
+    ("2024-09-23T23:59:59", date(2024, 9, 17)),
+])
+def test_get_week_key_starts_weeks_on_tuesday(value, expected):
+    assert gather.get_week_key(gather.parse_week_of(value), 1) == expected
+
+
+def test_precompute_season_buckets_and_sorts_by_week():
+    games = load_games()
+    season = gather.precompute_season(list(reversed(games)), 1)
+
+    assert sorted(season) == [date(2024, 9, 24), date(2024, 10, 1)]
+    for week_key, slate in season.items():
+        kickoffs = [isoparse(game["commence_time"]) for _, day_games in slate for game in day_games]
+        assert kickoffs == sorted(kickoffs)
+        assert all(gather.get_week_key(kickoff, 1) == week_key for kickoff in kickoffs)
+        day_names = [day for day, _ in slate]
+        assert len(day_names) == len(set(day_names))
+    assert sum(len(day_games) for slate in season.values() for _, day_games in slate) == len(games)
+
+
+def test_precompute_season_skips_games_missing_a_market():
+    games = load_games()
+    games.append(make_game("2024-11-10T10:00:00-08:00", (-3.0, 3.0), totals=None))
+    games.append({**make_game("2024-11-10T13:05:00-08:00", (-3.0, 3.0)), "bookmakers": []})
+
+    season = gather.precompute_season(games, 1)
+
+    assert date(2024, 11, 5) not in season
+    assert sorted(season) == [date(2024, 9, 24), date(2024, 10, 1)]
+
+
+def test_transform_game_defaults_pickem_to_the_first_team():
+    game = gather.transform_game(make_game("2024-09-26T17:15:00-07:00", (0.0, 0.0)))
+
+    assert game["favored_team"] == "Dallas Cowboys"
+    assert game["point_spread"] == -0.5
+    assert game["totals_point"] == 45.5
+
+
+def test_transform_game_finds_markets_by_key():
+    game = make_game("2024-09-26T17:15:00-07:00", (3.5, -3.5), totals=41.5)
+    game["bookmakers"][0]["markets"].reverse()
+
+    transformed_game = gather.transform_game(game)
+
+    assert transformed_game["favored_team"] == "New York Giants"
+    assert transformed_game["point_spread"] == -3.5
+    assert transformed_game["totals_point"] == 41.5
+
+
+@pytest.mark.parametrize("now", [
+    "2024-09-24T00:00:00", "2024-09-26T18:00:00", "2024-09-30T23:59:00", "2024-10-02T18:00:00"
+])
+def test_transform_game_data_matches_the_baseline(monkeypatch, now):
+    now = gather.parse_week_of(now)
+    freeze_now(monkeypatch, now)
+    expected = baseline_transform_game_data(load_games(), now)
+
+    transformed_games = gather.transform_game_data(load_games())
+
+    assert transformed_games == expected
+    assert gather.format_games(transformed_games, "<br>") == baseline_format_games(expected, "<br>")
+
+
+@pytest.fixture
+def local_source(monkeypatch):
+    args = argparse.Namespace(source=GAMES_FILE, week=None, backfill=None, output=None, workers=None)
+    monkeypatch.setattr(gather, "parse_args", lambda: args)
+    monkeypatch.setattr(gather, "_season_cache", {})
+
+
+def test_lambda_handler_serves_a_requested_week(local_source):
+    response = gather.lambda_handler({"queryStringParameters": {"week": "2024-10-03"}}, None)
+
+    now = gather.parse_week_of("2024-10-03")
+    expected = baseline_format_games(baseline_transform_game_data(load_games(), now), "<br>")
+    assert response["statusCode"] == 200
+    assert response["body"] == expected
+    other_week = baseline_transform_game_data(load_games(), gather.parse_week_of("2024-09-26"))
+    assert expected and expected != baseline_format_games(other_week, "<br>")
+
+
+def test_lambda_handler_rejects_an_unparsable_week(local_source):
+    response = gather.lambda_handler({"queryStringParameters": {"week": "next tuesday"}}, None)
+
+    assert response["statusCode"] == 400
+    assert response["body"] == "Invalid week: next tuesday"
+
+
+def test_get_api_season_is_cached_per_container(monkeypatch):
+    refreshes = []
+
+    def fake_refresh_board(api_key, window_start, window_end):
+        refreshes.append((window_start, window_end))
+        return [{
+            "id": "game",
+            "commence_time": "2024-09-27T00:15:00Z",
+            "home_team": "New York Giants",
+            "away_team": "Dallas Cowboys",
+            "bookmakers": []
+        }]
+
+    monkeypatch.setattr(gather, "refresh_board", fake_refresh_board)
+    monkeypatch.setattr(gather, "get_odds_api_key", lambda: "key")
+    monkeypatch.setattr(gather, "_season_cache", {})
+
+    season = gather.get_api_season()
+    assert gather.get_api_season() is season
+    assert len(refreshes) == 1
+
+    monkeypatch.setattr(gather, "SEASON_CACHE_TTL_SECONDS", 0)
+    gather.get_api_season()
+    assert len(refreshes) == 2
+
+
+def test_lambda_handler_reports_memory_on_failure(monkeypatch):
+    reports = []
+
+    def failing_load_week_slate(week_of=None, args=None):
+        raise RuntimeError("odds API unavailable")
+
+    monkeypatch.setattr(gather, "load_week_slate", failing_load_week_slate)
+    monkeypatch.setattr(gather.profiler, "report", lambda: reports.append(True))
+
+    with pytest.raises(RuntimeError):
+        gather.lambda_handler({}, None)
+
+    assert reports == [True]
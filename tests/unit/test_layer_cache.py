@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from mfl_odds_poster import layer_cache
+
+
+def fake_pip(calls):
+    def check_call(args):
+        calls.append(args)
+        os.makedirs(args[-1], exist_ok=True)
+    return check_call
+
+
+def test_layer_is_rebuilt_only_when_requirements_change(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(layer_cache.subprocess, "check_call", fake_pip(calls))
+    monkeypatch.delenv("SKIP_PIP", raising=False)
+    requirements_file = tmp_path / "requirements.txt"
+    requirements_file.write_text("requests==2.32.3\n")
+    build_root = str(tmp_path / "build")
+    os.makedirs(build_root)
+
+    first_dir, first_hash = layer_cache.build_dependencies(str(requirements_file), "gather", build_root)
+    second_dir, second_hash = layer_cache.build_dependencies(str(requirements_file), "gather", build_root)
+    assert (first_dir, first_hash) == (second_dir, second_hash)
+    assert len(calls) == 1
+
+    requirements_file.write_text("requests==2.32.4\n")
+    third_dir, third_hash = layer_cache.build_dependencies(str(requirements_file), "gather", build_root)
+    assert third_hash != first_hash
+    assert len(calls) == 2
+    assert not os.path.exists(first_dir)
+
+
+def test_functions_get_separate_layer_directories(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(layer_cache.subprocess, "check_call", fake_pip(calls))
+    monkeypatch.delenv("SKIP_PIP", raising=False)
+    requirements_file = tmp_path / "requirements.txt"
+    requirements_file.write_text("requests==2.32.3\n")
+    build_root = str(tmp_path / "build")
+    os.makedirs(build_root)
+
+    gather_dir, _ = layer_cache.build_dependencies(str(requirements_file), "gather", build_root)
+    post_dir, _ = layer_cache.build_dependencies(str(requirements_file), "post", build_root)
+    assert gather_dir != post_dir
+    assert os.path.isdir(os.path.join(post_dir, "python"))
+    # The second function copies the first one's build instead of running pip
+    assert len(calls) == 1
+
+
+def test_skip_pip_falls_back_to_the_latest_completed_build(tmp_path, monkeypatch, caplog):
+    calls = []
+    monkeypatch.setattr(layer_cache.subprocess, "check_call", fake_pip(calls))
+    monkeypatch.delenv("SKIP_PIP", raising=False)
+    requirements_file = tmp_path / "requirements.txt"
+    requirements_file.write_text("requests==2.32.3\n")
+    build_root = str(tmp_path / "build")
+    os.makedirs(build_root)
+    built_dir, built_hash = layer_cache.build_dependencies(str(requirements_file), "gather", build_root)
+
+    monkeypatch.setenv("SKIP_PIP", "1")
+    # Another function with the same requirements reuses the build
+    assert layer_cache.build_dependencies(str(requirements_file), "post", build_root) == (built_dir, built_hash)
+
+    requirements_file.write_text("requests==2.32.4\n")
+    skip_dir, skip_hash = layer_cache.build_dependencies(str(requirements_file), "gather", build_root)
+    assert (skip_dir, skip_hash) == (built_dir, built_hash)
+    assert f"Using the gather layer from gather-{built_hash}" in caplog.text
+    assert len(calls) == 1
+
+
+def test_skip_pip_without_a_build_fails_clearly(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKIP_PIP", "1")
+    requirements_file = tmp_path / "requirements.txt"
+    requirements_file.write_text("requests==2.32.3\n")
+
+    with pytest.raises(RuntimeError, match="no completed layer build for gather"):
+        layer_cache.build_dependencies(str(requirements_file), "gather", str(tmp_path / "build"))
@@ -0,0 +1,28 @@
+from memory_profile import MemoryProfiler
+
+ALLOCATION_MB = 64
+
+
+def test_stages_record_peak_rss_growth_not_the_process_peak():
+    profiler = MemoryProfiler(enabled=True)
+
+    with profiler.stage("allocate"):
+        data = b"x" * (ALLOCATION_MB * 1024 * 1024)
+        del data
+    with profiler.stage("small"):
+        sum(range(1000))
+
+    allocate, small = profiler.report()
+    assert allocate["peak_rss_growth_mb"] > ALLOCATION_MB / 2
+    # The later stage stays under the peak the first one set
+    assert small["peak_rss_growth_mb"] < 1
+    assert small["process_peak_rss_mb"] >= allocate["process_peak_rss_mb"]
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = MemoryProfiler(enabled=False)
+
+    with profiler.stage("allocate"):
+        pass
+
+    assert profiler.report() == []
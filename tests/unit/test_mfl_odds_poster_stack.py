@@ -1,6 +1,7 @@
 import aws_cdk as core
 import aws_cdk.assertions as assertions
 
+import object_store
 from mfl_odds_poster.mfl_odds_poster_stack import MflOddsPosterStack
 
 # example tests. To run these tests, uncomment this file along with the example
@@ -13,3 +14,19 @@ def test_sqs_queue_created():
 #     template.has_resource_properties("AWS::SQS::Queue", {
 #         "VisibilityTimeout": 300
 #     })
+
+
+def test_lock_waits_fit_in_the_poster_timeout():
+    app = core.App()
+    stack = MflOddsPosterStack(app, "mfl-odds-poster")
+    template = assertions.Template.from_stack(stack)
+
+    posters = template.find_resources("AWS::Lambda::Function", {
+        "Properties": {"Handler": "post.lambda_handler"}
+    })
+    assert len(posters) == 1
+    timeout = next(iter(posters.values()))["Properties"]["Timeout"]
+    # A poster waiting on the session lock has to give up and log in itself
+    # before Lambda kills it
+    assert object_store.LOCK_WAIT_SECONDS < timeout
+    assert object_store.LOCK_STALE_SECONDS < timeout
@@ -0,0 +1,82 @@
+import datetime
+import random
+import zoneinfo
+
+import pytest
+import pytz
+
+import nfl_weeks
+import post
+
+PT = pytz.timezone("US/Pacific")
+SEASON_FIRST_DAYS = {
+    2023: datetime.datetime(2023, 9, 8, 0, 20, tzinfo=datetime.timezone.utc),
+    2024: datetime.datetime(2024, 9, 6, 0, 20, tzinfo=datetime.timezone.utc),
+    2025: datetime.datetime(2025, 9, 5, 0, 20, tzinfo=datetime.timezone.utc),
+}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def bulk_branch(request, monkeypatch):
+    """
+    Runs a test against the vectorized numpy branch and the plain Python
+    fallback used when numpy isn't installed.
+    """
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(nfl_weeks, "np", None)
+    return request.param
+
+
+def scalar_bucket(timestamp, tz, week_start):
+    date = datetime.datetime.fromtimestamp(timestamp, tz)
+    week_1_starts = {
+        season: post.get_week_start_end(first_day.astimezone(tz), week_start)[0]
+        for season, first_day in SEASON_FIRST_DAYS.items()
+    }
+    started = [season for season, start in week_1_starts.items() if start <= date]
+    season = max(started) if started else min(week_1_starts)
+    return season, post.get_current_nfl_week(week_1_starts[season], date), date.weekday()
+
+
+def get_dst_end_timestamps(tz):
+    # Every half hour through the week after each season's DST change and the
+    # last hour of every day through January, where an elapsed time count drifts
+    timestamps = []
+    for year in (2023, 2024, 2025):
+        start = tz.localize(datetime.datetime(year, 10, 30))
+        timestamps += [int(start.timestamp()) + minutes * 60 for minutes in range(0, 14 * 24 * 60, 30)]
+        for day in range(90):
+            date = tz.localize(datetime.datetime(year, 11, 1, 23, 50) + datetime.timedelta(days=day))
+            timestamps.append(int(date.timestamp()))
+    return timestamps
+
+
+@pytest.mark.parametrize("tz", [pytz.utc, PT], ids=["utc", "pacific"])
+@pytest.mark.parametrize("week_start", [1, 3, 6])
+def test_bucket_timestamps_matches_scalar(tz, week_start, bulk_branch):
+    rng = random.Random(week_start)
+    start = int(datetime.datetime(2023, 8, 1, tzinfo=datetime.timezone.utc).timestamp())
+    end = int(datetime.datetime(2026, 2, 15, tzinfo=datetime.timezone.utc).timestamp())
+    timestamps = [rng.randrange(start, end) for _ in range(2000)] + get_dst_end_timestamps(PT)
+
+    seasons, weeks, days_of_week = nfl_weeks.bucket_timestamps(timestamps, SEASON_FIRST_DAYS, week_start, tz)
+
+    for i, timestamp in enumerate(timestamps):
+        assert (int(seasons[i]), int(weeks[i]), int(days_of_week[i])) == \
+            scalar_bucket(timestamp, tz, week_start), timestamp
+
+
+def test_bucket_timestamps_last_hour_after_dst_end(bulk_branch):
+    date = PT.localize(datetime.datetime(2026, 1, 26, 23, 50))
+
+    seasons, weeks, days_of_week = nfl_weeks.bucket_timestamps([int(date.timestamp())], SEASON_FIRST_DAYS, 1, PT)
+
+    assert (int(seasons[0]), int(weeks[0]), int(days_of_week[0])) == (2025, 21, 0)
+    assert scalar_bucket(int(date.timestamp()), PT, 1) == (2025, 21, 0)
+
+
+def test_bucket_timestamps_rejects_zoneinfo(bulk_branch):
+    with pytest.raises(ValueError, match="Unsupported time zone"):
+        nfl_weeks.bucket_timestamps([0], SEASON_FIRST_DAYS, 1, zoneinfo.ZoneInfo("America/Los_Angeles"))
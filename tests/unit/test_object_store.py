@@ -0,0 +1,152 @@
+import io
+import os
+import stat
+import time
+from datetime import datetime, timedelta, timezone
+
+import boto3
+import pytest
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+import object_store
+from object_store import FileObjectStore, S3ObjectStore
+
+BUCKET = "mfl-odds-cache"
+PREFIX = "session-cache/"
+LOCK_KEY = f"{PREFIX}mfl-session.lock"
+LOCK_PUT = {"Bucket": BUCKET, "Key": LOCK_KEY, "Body": b"", "IfNoneMatch": "*"}
+LOCK_OBJECT = {"Bucket": BUCKET, "Key": LOCK_KEY}
+
+
+@pytest.fixture
+def s3_store(monkeypatch):
+    monkeypatch.setattr(object_store, "LOCK_POLL_SECONDS", 0)
+    client = boto3.client("s3", region_name="us-east-1", aws_access_key_id="test", aws_secret_access_key="test")
+    with Stubber(client) as stubber:
+        yield S3ObjectStore(client, BUCKET, prefix=PREFIX), stubber
+        stubber.assert_no_pending_responses()
+
+
+def lock_held_since(stubber, last_modified):
+    stubber.add_client_error("put_object", service_error_code="PreconditionFailed",
+                             http_status_code=412, expected_params=LOCK_PUT)
+    stubber.add_response("head_object", {"LastModified": last_modified}, LOCK_OBJECT)
+
+
+def test_file_store_get_returns_none_for_a_missing_key(tmp_path):
+    assert FileObjectStore(str(tmp_path)).get("missing") is None
+
+
+def test_file_store_round_trips_nested_keys(tmp_path):
+    store = FileObjectStore(str(tmp_path))
+
+    store.put("odds-board/americanfootball_nfl.json", b"board")
+
+    assert store.get("odds-board/americanfootball_nfl.json") == b"board"
+    assert stat.S_IMODE(os.stat(tmp_path / "odds-board" / "americanfootball_nfl.json").st_mode) == 0o600
+
+
+def test_file_store_put_is_atomic(tmp_path, monkeypatch):
+    store = FileObjectStore(str(tmp_path))
+    store.put("key", b"old")
+
+    def crash(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        store.put("key", b"new")
+
+    assert store.get("key") == b"old"
+    assert os.listdir(tmp_path) == ["key"]
+
+
+def test_file_lock_gives_up_after_the_wait(tmp_path, monkeypatch):
+    monkeypatch.setattr(object_store, "LOCK_WAIT_SECONDS", 0.2)
+    monkeypatch.setattr(object_store, "LOCK_POLL_SECONDS", 0.05)
+    store = FileObjectStore(str(tmp_path))
+
+    with store.lock("key"):
+        start = time.time()
+        with FileObjectStore(str(tmp_path)).lock("key"):
+            waited = time.time() - start
+
+    assert 0.2 <= waited < 1
+
+
+def test_s3_store_get_and_put_use_the_prefix(s3_store):
+    store, stubber = s3_store
+    stubber.add_response("put_object", {}, {"Bucket": BUCKET, "Key": f"{PREFIX}mfl-session", "Body": b"data"})
+    stubber.add_response("get_object", {"Body": StreamingBody(io.BytesIO(b"data"), 4)},
+                         {"Bucket": BUCKET, "Key": f"{PREFIX}mfl-session"})
+
+    store.put("mfl-session", b"data")
+
+    assert store.get("mfl-session") == b"data"
+
+
+def test_s3_store_get_returns_none_for_no_such_key(s3_store):
+    store, stubber = s3_store
+    stubber.add_client_error("get_object", service_error_code="NoSuchKey", http_status_code=404)
+
+    assert store.get("mfl-session") is None
+
+
+def test_s3_store_get_raises_other_errors(s3_store):
+    store, stubber = s3_store
+    stubber.add_client_error("get_object", service_error_code="AccessDenied", http_status_code=403)
+
+    with pytest.raises(store.client.exceptions.ClientError):
+        store.get("mfl-session")
+
+
+def test_s3_lock_is_a_conditional_put_released_on_exit(s3_store):
+    store, stubber = s3_store
+    stubber.add_response("put_object", {}, LOCK_PUT)
+    stubber.add_response("delete_object", {}, LOCK_OBJECT)
+
+    with store.lock("mfl-session"):
+        pass
+
+
+def test_s3_lock_waits_for_a_live_holder(s3_store):
+    store, stubber = s3_store
+    lock_held_since(stubber, datetime.now(timezone.utc))
+    stubber.add_response("put_object", {}, LOCK_PUT)
+    stubber.add_response("delete_object", {}, LOCK_OBJECT)
+
+    with store.lock("mfl-session"):
+        pass
+
+
+def test_s3_lock_breaks_a_stale_lock(s3_store):
+    store, stubber = s3_store
+    stale = datetime.now(timezone.utc) - timedelta(seconds=object_store.LOCK_STALE_SECONDS + 1)
+    lock_held_since(stubber, stale)
+    stubber.add_response("delete_object", {}, LOCK_OBJECT)
+    stubber.add_response("put_object", {}, LOCK_PUT)
+    stubber.add_response("delete_object", {}, LOCK_OBJECT)
+
+    with store.lock("mfl-session"):
+        pass
+
+
+def test_s3_lock_continues_without_the_lock_after_the_wait(s3_store, monkeypatch):
+    monkeypatch.setattr(object_store, "LOCK_WAIT_SECONDS", 0)
+    store, stubber = s3_store
+    lock_held_since(stubber, datetime.now(timezone.utc))
+
+    # Nothing is deleted on exit, as the lock belongs to the other caller
+    with store.lock("mfl-session"):
+        pass
+
+
+def test_s3_lock_raises_unexpected_errors(s3_store):
+    store, stubber = s3_store
+    stubber.add_client_error("put_object", service_error_code="AccessDenied",
+                             http_status_code=403, expected_params=LOCK_PUT)
+
+    with pytest.raises(store.client.exceptions.ClientError):
+        with store.lock("mfl-session"):
+            pass
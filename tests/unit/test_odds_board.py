@@ -0,0 +1,155 @@
+import datetime
+
+import pytest
+
+import odds_board
+from object_store import FileObjectStore
+
+NOW = datetime.datetime(2024, 9, 25, 12, tzinfo=datetime.timezone.utc).timestamp()
+WINDOW_START = datetime.datetime(2024, 9, 24, 7, tzinfo=datetime.timezone.utc)
+WINDOW_END = datetime.datetime(2024, 10, 1, 6, 59, tzinfo=datetime.timezone.utc)
+
+
+def make_game(game_id, commence_time, bookmakers=("draftkings",)):
+    return {
+        "id": game_id,
+        "commence_time": commence_time,
+        "bookmakers": [{"key": bookmaker} for bookmaker in bookmakers]
+    }
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    calls = []
+    events = [make_game("upcoming", "2024-09-27T00:15:00Z")]
+
+    def fake_get_from_api(path, api_key, params):
+        calls.append(path)
+        return events
+
+    monkeypatch.setattr(odds_board, "get_from_api", fake_get_from_api)
+    return calls
+
+
+def test_refresh_board_skips_the_api_while_the_board_is_fresh(tmp_path, api_calls):
+    store = FileObjectStore(str(tmp_path))
+
+    games = odds_board.refresh_board("key", WINDOW_START, WINDOW_END, store, NOW)
+    assert api_calls == ["events", "odds"]
+    assert [game["id"] for game in games] == ["upcoming"]
+
+    games = odds_board.refresh_board("key", WINDOW_START, WINDOW_END, store, NOW + 60)
+    assert api_calls == ["events", "odds"]
+    assert [game["id"] for game in games] == ["upcoming"]
+
+    odds_board.refresh_board("key", WINDOW_START, WINDOW_END, store, NOW + odds_board.ODDS_REFRESH_SECONDS)
+    assert api_calls == ["events", "odds", "events", "odds"]
+
+
+def test_refresh_board_checks_a_new_window(tmp_path, api_calls):
+    store = FileObjectStore(str(tmp_path))
+    odds_board.refresh_board("key", WINDOW_START, WINDOW_END, store, NOW)
+
+    next_week = datetime.timedelta(weeks=1)
+    odds_board.refresh_board("key", WINDOW_START + next_week, WINDOW_END + next_week, store, NOW + 60)
+
+    assert api_calls == ["events", "odds", "events"]
+
+
+def test_refresh_board_uses_the_board_for_a_past_window(tmp_path, api_calls):
+    store = FileObjectStore(str(tmp_path))
+    odds_board.refresh_board("key", WINDOW_START, WINDOW_END, store, NOW)
+
+    games = odds_board.refresh_board("key", WINDOW_START, WINDOW_END, store, WINDOW_END.timestamp() + 1)
+
+    assert api_calls == ["events", "odds"]
+    assert [game["id"] for game in games] == ["upcoming"]
+
+
+def test_plan_fetch_picks_missing_and_stale_upcoming_games():
+    board = {
+        "games": {
+            "fresh": make_game("fresh", "2024-09-27T00:15:00Z"),
+            "stale": make_game("stale", "2024-09-27T00:15:00Z"),
+            "started": make_game("started", "2024-09-24T00:15:00Z"),
+        },
+        "fetched_at": {
+            "fresh": NOW - 60,
+            "stale": NOW - odds_board.ODDS_REFRESH_SECONDS,
+            "started": NOW - 2 * 24 * 60 * 60,
+        }
+    }
+    events = [
+        make_game("fresh", "2024-09-27T00:15:00Z"),
+        make_game("stale", "2024-09-27T00:15:00Z"),
+        make_game("started", "2024-09-24T00:15:00Z"),
+        make_game("missing", "2024-09-30T00:15:00Z"),
+    ]
+
+    assert odds_board.plan_fetch(board, events, NOW) == ["stale", "missing"]
+
+
+def test_merge_odds_keeps_lines_the_bookmaker_pulled():
+    board = {"games": {"known": make_game("known", "2024-09-27T00:15:00Z")}, "fetched_at": {"known": NOW - 3600}}
+    games = [
+        make_game("known", "2024-09-27T00:15:00Z", bookmakers=()),
+        make_game("new", "2024-09-30T00:15:00Z", bookmakers=()),
+    ]
+
+    odds_board.merge_odds(board, games, NOW)
+
+    assert board["games"]["known"]["bookmakers"] == [{"key": "draftkings"}]
+    assert board["games"]["new"]["bookmakers"] == []
+    assert board["fetched_at"] == {"known": NOW, "new": NOW}
+    # Not requested again until the lines go stale
+    assert odds_board.plan_fetch(board, games, NOW + 60) == []
+
+
+def test_merge_odds_replaces_lines():
+    board = {"games": {"known": make_game("known", "2024-09-27T00:15:00Z")}, "fetched_at": {"known": NOW - 3600}}
+
+    odds_board.merge_odds(board, [make_game("known", "2024-09-27T00:15:00Z", bookmakers=("fanduel",))], NOW)
+
+    assert board["games"]["known"]["bookmakers"] == [{"key": "fanduel"}]
+    assert board["fetched_at"]["known"] == NOW
+
+
+def test_prune_board_drops_games_past_retention():
+    retention = datetime.timedelta(days=odds_board.BOARD_RETENTION_DAYS)
+    old_time = (datetime.datetime.fromtimestamp(NOW, datetime.timezone.utc) - retention - datetime.timedelta(hours=1))
+    board = {
+        "games": {
+            "old": make_game("old", old_time.strftime("%Y-%m-%dT%H:%M:%SZ")),
+            "recent": make_game("recent", "2024-09-08T17:00:00Z"),
+        },
+        "fetched_at": {"old": NOW, "recent": NOW}
+    }
+
+    odds_board.prune_board(board, NOW)
+
+    assert list(board["games"]) == ["recent"]
+    assert list(board["fetched_at"]) == ["recent"]
+
+
+def test_load_board_starts_a_new_board_when_missing(tmp_path):
+    assert odds_board.load_board(FileObjectStore(str(tmp_path))) == {"games": {}, "fetched_at": {}}
+
+
+def test_load_board_does_not_replace_a_corrupt_board(tmp_path, api_calls):
+    store = FileObjectStore(str(tmp_path))
+    store.put(odds_board.BOARD_KEY, b'{"games": {"trunc')
+
+    with pytest.raises(ValueError):
+        odds_board.refresh_board("key", WINDOW_START, WINDOW_END, store, NOW)
+
+    assert store.get(odds_board.BOARD_KEY) == b'{"games": {"trunc'
+    assert api_calls == []
+
+
+def test_load_board_raises_read_errors():
+    class UnavailableStore:
+        def get(self, key):
+            raise ConnectionError("S3 unavailable")
+
+    with pytest.raises(ConnectionError):
+        odds_board.load_board(UnavailableStore())
@@ -0,0 +1,58 @@
+import pytest
+
+import post
+from slate_payload import encode_payload
+
+SLATE = [["Thursday, September 26", [{
+    "commence_time": "2024-09-26T17:15:00-07:00",
+    "favored_team": "Dallas Cowboys",
+    "away_team": "Dallas Cowboys",
+    "home_team": "New York Giants",
+    "point_spread": "-5.5",
+    "totals_point": "45.5"
+}]]]
+
+
+def test_get_body_renders_the_envelope():
+    envelope = encode_payload({"week_start": "2024-09-24", "slate": SLATE})
+
+    assert post.get_body({"envelope": envelope}) == (
+        "<br>*** THURSDAY, SEPTEMBER 26 ***<br><br>"
+        "Dallas Cowboys | -5.5 | 45.5<br>"
+        "New York Giants<br><br>")
+
+
+def test_get_body_accepts_a_rendered_body():
+    assert post.get_body({"body": {"body": "rendered"}}) == "rendered"
+
+
+@pytest.mark.parametrize("event", [{}, {"body": {}}, {"envelope": {"version": 99}}])
+def test_get_body_raises_without_a_body(event):
+    with pytest.raises((KeyError, ValueError)):
+        post.get_body(event)
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("No JSON object could be decoded")
+        return self.body
+
+
+@pytest.mark.parametrize("response, expected", [
+    (FakeResponse(401), True),
+    (FakeResponse(403), True),
+    (FakeResponse(200, {"error": {"$t": "You must be logged in to do that."}}), True),
+    (FakeResponse(200, {"error": "Invalid cookie"}), True),
+    (FakeResponse(200, {"status": "OK"}), False),
+    (FakeResponse(200, {"error": {"$t": "Message too long"}}), False),
+    (FakeResponse(200, ["not", "a", "dict"]), False),
+    (FakeResponse(200), False),
+    (FakeResponse(500), False),
+])
+def test_is_auth_failure(response, expected):
+    assert post.is_auth_failure(response) is expected
@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+
+import session_cache
+from object_store import FileObjectStore
+from session_cache import SessionCache
+
+
+class FakeLogin:
+    def __init__(self, expires_in=3600, delay=0):
+        self.calls = 0
+        self.expires_in = expires_in
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            return f"cookie-{self.calls}", time.time() + self.expires_in
+
+
+class XorCipher:
+    def encrypt(self, plaintext):
+        return bytes(b ^ 0x5A for b in plaintext)
+
+    def decrypt(self, ciphertext):
+        return bytes(b ^ 0x5A for b in ciphertext)
+
+
+def test_get_cookie_logs_in_once_and_reuses_the_cache(tmp_path):
+    login = FakeLogin()
+    cache = SessionCache(FileObjectStore(str(tmp_path)), None, login)
+
+    assert cache.get_cookie() == "cookie-1"
+    assert cache.get_cookie() == "cookie-1"
+    # A new container sees the same cached session
+    assert SessionCache(FileObjectStore(str(tmp_path)), None, login).get_cookie() == "cookie-1"
+    assert login.calls == 1
+
+
+def test_get_cookie_logs_in_again_once_expired(tmp_path):
+    login = FakeLogin(expires_in=session_cache.EXPIRY_MARGIN_SECONDS - 1)
+    cache = SessionCache(FileObjectStore(str(tmp_path)), None, login)
+
+    assert cache.get_cookie() == "cookie-1"
+    assert cache.get_cookie() == "cookie-2"
+
+
+def test_get_cookie_defaults_a_missing_expiry(tmp_path):
+    cache = SessionCache(FileObjectStore(str(tmp_path)), None, lambda: ("cookie", None))
+
+    cache.get_cookie()
+
+    session = json.loads(FileObjectStore(str(tmp_path)).get(session_cache.SESSION_CACHE_KEY))
+    assert session["expires"] > time.time() + session_cache.DEFAULT_SESSION_TTL_SECONDS - 60
+
+
+def test_get_cookie_ignores_an_unreadable_cache(tmp_path):
+    store = FileObjectStore(str(tmp_path))
+    store.put(session_cache.SESSION_CACHE_KEY, b"not json")
+    login = FakeLogin()
+
+    assert SessionCache(store, None, login).get_cookie() == "cookie-1"
+    assert login.calls == 1
+
+
+def test_cache_is_encrypted_with_the_cipher(tmp_path):
+    store = FileObjectStore(str(tmp_path))
+    cache = SessionCache(store, XorCipher(), FakeLogin())
+
+    cache.get_cookie()
+
+    assert b"cookie-1" not in store.get(session_cache.SESSION_CACHE_KEY)
+    assert cache.get_cookie() == "cookie-1"
+
+
+def test_refresh_replaces_a_rejected_cookie(tmp_path):
+    login = FakeLogin()
+    cache = SessionCache(FileObjectStore(str(tmp_path)), None, login)
+    stale_cookie = cache.get_cookie()
+
+    assert cache.refresh(stale_cookie=stale_cookie) == "cookie-2"
+    assert cache.get_cookie() == "cookie-2"
+    assert login.calls == 2
+
+
+def test_refresh_uses_a_cookie_another_caller_refreshed(tmp_path):
+    login = FakeLogin()
+    cache = SessionCache(FileObjectStore(str(tmp_path)), None, login)
+    stale_cookie = cache.get_cookie()
+    cache.refresh(stale_cookie=stale_cookie)
+
+    assert cache.refresh(stale_cookie=stale_cookie) == "cookie-2"
+    assert login.calls == 2
+
+
+def test_refresh_logs_in_once_under_contention(tmp_path):
+    login = FakeLogin(delay=0.2)
+    store = FileObjectStore(str(tmp_path))
+    stale_cookie = SessionCache(store, None, login).get_cookie()
+    cookies = []
+
+    def refresh():
+        cookies.append(SessionCache(FileObjectStore(str(tmp_path)), None, login).refresh(stale_cookie=stale_cookie))
+
+    threads = [threading.Thread(target=refresh) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert login.calls == 2
+    assert cookies == ["cookie-2"] * 5
+
+
+def test_get_cookie_logs_in_once_on_a_cold_cache_under_contention(tmp_path):
+    login = FakeLogin(delay=0.2)
+    cookies = []
+
+    def get_cookie():
+        cookies.append(SessionCache(FileObjectStore(str(tmp_path)), None, login).get_cookie())
+
+    threads = [threading.Thread(target=get_cookie) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert login.calls == 1
+    assert cookies == ["cookie-1"] * 5
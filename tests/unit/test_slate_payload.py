@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+import slate_payload
+from object_store import FileObjectStore
+
+PAYLOAD = {
+    "week_start": "2024-09-24",
+    "slate": [["Thursday, September 26", [{
+        "commence_time": "2024-09-26T17:15:00-07:00",
+        "favored_team": "Dallas Cowboys",
+        "away_team": "Dallas Cowboys",
+        "home_team": "New York Giants",
+        "point_spread": "-5.5",
+        "totals_point": "45.5"
+    }]]]
+}
+
+
+def test_round_trip_inline(tmp_path):
+    store = FileObjectStore(str(tmp_path))
+
+    envelope = slate_payload.encode_payload(PAYLOAD, store)
+
+    assert "data" in envelope and "ref" not in envelope
+    assert os.listdir(tmp_path) == []
+    assert slate_payload.decode_payload(envelope, store) == PAYLOAD
+
+
+def test_round_trip_by_reference(tmp_path, monkeypatch):
+    monkeypatch.setattr(slate_payload, "MAX_INLINE_BYTES", 0)
+    store = FileObjectStore(str(tmp_path))
+
+    envelope = slate_payload.encode_payload(PAYLOAD, store)
+
+    assert envelope["ref"].startswith(slate_payload.PAYLOAD_KEY_PREFIX) and "data" not in envelope
+    assert os.path.exists(os.path.join(tmp_path, envelope["ref"]))
+    assert slate_payload.decode_payload(envelope, store) == PAYLOAD
+
+
+def test_round_trip_gzip_without_zstandard(monkeypatch):
+    monkeypatch.setattr(slate_payload, "zstandard", None)
+
+    envelope = slate_payload.encode_payload(PAYLOAD)
+
+    assert envelope["compression"] == slate_payload.COMPRESSION_GZIP
+    assert slate_payload.decode_payload(envelope) == PAYLOAD
+
+
+def test_decode_rejects_unknown_version():
+    envelope = slate_payload.encode_payload(PAYLOAD)
+    envelope["version"] = slate_payload.ENVELOPE_VERSION + 1
+
+    with pytest.raises(ValueError, match="Unsupported payload envelope version"):
+        slate_payload.decode_payload(envelope)